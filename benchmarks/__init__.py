@@ -0,0 +1,7 @@
+"""Performance benchmarks of Elegant on synthetic grids
+
+Run them from the repository root with ``python -m benchmarks run`` and
+compare two result files with ``python -m benchmarks compare old new``.
+"""
+from .cases import *
+from .run import *
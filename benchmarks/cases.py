@@ -0,0 +1,97 @@
+import numpy as np
+
+from elegant.core import PowerSystem, Bus, TransmissionLine, Transformer, DELTA
+
+__all__ = ['radial', 'meshed', 'ring', 'CASES']
+
+LOAD = 1.0
+VBASE = 1.38e5
+IMAX = 400
+
+
+def new_system(n, sparse):
+    """PowerSystem with n isolated buses, bus 0 being a grounded generator"""
+    system = PowerSystem(sparse=sparse)
+    # add_bus renumbers the buses and checks every branch, which is quadratic
+    # in the number of buses, so they are created here directly
+    system.buses = [Bus(bus_id=k) for k in range(n)]
+    system.graph.add_nodes_from(system.buses)
+    system.touch()
+    slack = system.buses[0]
+    slack.v = 1.02
+    slack.xd = 0.2
+    slack.gen_ground = True
+    return system
+
+
+def connect(system, pairs, ell):
+    buses = system.buses
+    for i, j in pairs:
+        system.add_line(TransmissionLine(buses[i], buses[j], ell=ell, vbase=VBASE, imax=IMAX))
+
+
+def spread_load(system, generators=()):
+    """Shares LOAD pu among the buses, half of it supplied by the generators"""
+    loads = system.buses[1:]
+    for bus in loads:
+        bus.pl = LOAD / len(loads)
+        bus.ql = 0.3 * LOAD / len(loads)
+    for k in generators:
+        bus = system.buses[k]
+        bus.pg = 0.5 * LOAD / len(generators)
+        bus.v = 1.0
+        bus.xd = 0.25
+        bus.gen_ground = True
+
+
+def feed(system, k):
+    """Supplies bus k from the slack bus through a step-up transformer"""
+    system.add_trafo(Transformer(system.buses[0], system.buses[k], jx0=0.05, jx1=0.05,
+                                 primary=DELTA))
+
+
+def radial(n, sparse=False, seed=0):
+    """Radial feeder: a random tree of n - 1 buses fed by the slack bus
+
+    Each bus hangs from a uniformly chosen earlier one, so laterals of every
+    length branch off the trunk. The feeder is 500 km long in total.
+    """
+    system = new_system(n, sparse)
+    rng = np.random.RandomState(seed)
+    feed(system, 1)
+    connect(system, [(rng.randint(1, k), k) for k in range(2, n)], ell=500e3 / (n - 1))
+    spread_load(system)
+    return system
+
+
+def meshed(n, sparse=False):
+    """Meshed grid: a square lattice of n - 1 buses fed at its center
+
+    One bus in 25 holds a PV generator.
+    """
+    system = new_system(n, sparse)
+    side = int(np.ceil(np.sqrt(n - 1)))
+    pairs = []
+    for k in range(n - 1):
+        row, col = divmod(k, side)
+        if col + 1 < side and k + 1 < n - 1:
+            pairs.append((k + 1, k + 2))
+        if k + side < n - 1:
+            pairs.append((k + 1, k + side + 1))
+    feed(system, (n - 1) // 2 + 1)
+    connect(system, pairs, ell=200e3 / side)
+    spread_load(system, generators=range(13, n, 25))
+    return system
+
+
+def ring(n, sparse=False):
+    """Ring network: n - 1 buses in a loop with three PV generators"""
+    system = new_system(n, sparse)
+    m = n - 1
+    feed(system, 1)
+    connect(system, [(k + 1, (k + 1) % m + 1) for k in range(m)], ell=200e3 / m)
+    spread_load(system, generators=sorted(set(1 + m * q // 4 for q in (1, 2, 3))))
+    return system
+
+
+CASES = {'radial': radial, 'meshed': meshed, 'ring': ring}
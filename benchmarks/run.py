@@ -0,0 +1,241 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+
+import elegant
+from elegant.report import text_report
+
+from .cases import CASES
+
+__all__ = ['run_case', 'run', 'compare', 'main']
+
+PHASES = ('build', 'topology', 'ybus', 'load_flow', 'faults', 'report')
+SIZES = (10, 100, 1000, 10000)
+SPARSE_FROM = 2000
+
+
+def tolerance(n):
+    """Load flow tolerance for n buses
+
+    The cases keep their total line length as they grow, so that the
+    admittances, and the rounding error of the power mismatches, grow with
+    n. At 10,000 buses the Newton step bottoms out around 1e-11.
+    """
+    return max(1e-12, 1e-14 * n)
+
+
+def steps(system, directory):
+    """Benchmarked phases after building the system, as (name, callable) pairs"""
+    eps = tolerance(system.N)
+    return [('topology', lambda: system.topology),
+            ('ybus', lambda: system.Y),
+            ('load_flow', lambda: system.update(warm=False, eps=eps)),
+            ('faults', lambda: system.short_circuit()),
+            ('report', lambda: text_report(system, None, None,
+                                           os.path.join(directory, 'bench')))]
+
+
+def timed(function):
+    start = time.perf_counter()
+    value = function()
+    return value, time.perf_counter() - start
+
+
+def traced(function):
+    tracemalloc.start()
+    try:
+        value = function()
+        return value, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(case, n, sparse, repeat=3, memory=True):
+    """Times each phase of one case and, optionally, measures its peak memory
+
+    Every repetition builds the system from scratch, so that no phase finds
+    the matrices cached by a previous one. The fastest repetition is kept.
+    Peak memory is measured in a separate pass under tracemalloc, whose
+    overhead would otherwise distort the timings.
+
+    Returns
+    -------
+    result: dict
+        ``case``, ``buses``, ``branches``, ``sparse``, the load flow
+        ``tolerance``, the ``reason`` and ``niter`` of the solver of each
+        island, whether they all ``converged`` and, for each phase, its
+        ``time`` (s), the ``times`` of every repetition and its ``peak``
+        traced memory (bytes, None if not measured)
+    """
+    build = CASES[case]
+    times = {phase: [] for phase in PHASES}
+    peaks = dict.fromkeys(PHASES)
+    with tempfile.TemporaryDirectory() as directory:
+        for _ in range(repeat):
+            system, elapsed = timed(lambda: build(n, sparse=sparse))
+            times['build'].append(elapsed)
+            for phase, step in steps(system, directory):
+                times[phase].append(timed(step)[1])
+        if memory:
+            system, peaks['build'] = traced(lambda: build(n, sparse=sparse))
+            for phase, step in steps(system, directory):
+                peaks[phase] = traced(step)[1]
+    solver = [{'reason': result.reason, 'niter': result.niter}
+              for result in system.solver_results]
+    return {'case': case,
+            'buses': n,
+            'branches': len(system.lines) + len(system.trafos),
+            'sparse': sparse,
+            'status': system.status,
+            'tolerance': tolerance(n),
+            'solver': solver,
+            'converged': all(island['reason'] == 'converged' for island in solver),
+            'phases': {phase: {'time': min(times[phase]),
+                               'times': times[phase],
+                               'peak': peaks[phase]} for phase in PHASES}}
+
+
+def commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(elegant.PACKAGEDIR),
+                                       universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(cases=tuple(CASES), sizes=SIZES, backend='auto', repeat=3, memory=True, log=None):
+    """Runs every case at every size
+
+    Parameters
+    ----------
+    cases: list of str, optional
+        Names of the case generators, see ``CASES``
+    sizes: list of int, optional
+        Numbers of buses
+    backend: {'auto', 'dense', 'sparse'}, optional
+        Matrix backend of the systems. 'auto' goes sparse from SPARSE_FROM
+        buses up, as a dense Ybus of 10,000 buses takes over a gigabyte.
+    repeat: int, optional
+        Number of timed repetitions of each case
+    memory: bool, optional
+        Whether to measure the peak memory of each phase
+    log: file, optional
+        Receives a line per case as it finishes
+
+    Returns
+    -------
+    results: dict
+        ``environment`` (versions, platform and git commit) and the
+        ``results`` of `run_case`, ready to be dumped as JSON
+    """
+    results = []
+    for n in sizes:
+        for case in cases:
+            sparse = backend == 'sparse' or (backend == 'auto' and n >= SPARSE_FROM)
+            result = run_case(case, n, sparse, repeat=repeat, memory=memory)
+            results.append(result)
+            if log is not None:
+                print(summary(result), file=log, flush=True)
+    environment = {'elegant': elegant.__version__,
+                   'commit': commit(),
+                   'python': platform.python_version(),
+                   'numpy': np.__version__,
+                   'scipy': scipy.__version__,
+                   'platform': platform.platform(),
+                   'processor': platform.processor(),
+                   'date': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    return {'environment': environment, 'results': results}
+
+
+def summary(result):
+    phases = ' '.join('{}={:.4f}s'.format(phase, value['time'])
+                      for phase, value in result['phases'].items())
+    return '{:>6} {:>6} {:>6} {}{}'.format(result['case'], result['buses'],
+                                           'sparse' if result['sparse'] else 'dense', phases,
+                                           '' if result['converged'] else ' <- not converged')
+
+
+def key(result):
+    return result['case'], result['buses'], result['sparse']
+
+
+def compare(old, new, threshold=1.25, floor=1e-3):
+    """Ratios new/old of the time and peak memory of every phase present in both runs
+
+    Times under floor seconds are taken as floor, so that the noise of the
+    quickest phases is not reported as a regression.
+
+    Returns
+    -------
+    rows: list of tuple
+        (case, buses, sparse, phase, time ratio, memory ratio or None)
+    regressions: list of tuple
+        The rows whose time or memory ratio exceeds threshold
+    """
+    before = {key(result): result for result in old['results']}
+    rows = []
+    for result in new['results']:
+        if key(result) not in before:
+            continue
+        phases = before[key(result)]['phases']
+        for phase, value in result['phases'].items():
+            if phase not in phases:
+                continue
+            time_ratio = max(value['time'], floor) / max(phases[phase]['time'], floor)
+            peak, old_peak = value['peak'], phases[phase]['peak']
+            memory_ratio = peak / max(old_peak, 1) if None not in (peak, old_peak) else None
+            rows.append(key(result) + (phase, time_ratio, memory_ratio))
+    regressions = [row for row in rows
+                   if row[4] > threshold or (row[5] is not None and row[5] > threshold)]
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description="Elegant performance benchmarks")
+    commands = parser.add_subparsers(dest='command')
+    run_parser = commands.add_parser('run', help="run the benchmarks")
+    run_parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=sorted(CASES))
+    run_parser.add_argument('--sizes', nargs='+', type=int, default=list(SIZES))
+    run_parser.add_argument('--backend', choices=('auto', 'dense', 'sparse'), default='auto')
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--no-memory', dest='memory', action='store_false',
+                            help="skip the tracemalloc pass")
+    run_parser.add_argument('-o', '--output', default='benchmarks.json')
+    compare_parser = commands.add_parser('compare', help="compare two result files")
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=1.25,
+                                help="ratio above which a phase counts as a regression")
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        results = run(args.cases, args.sizes, backend=args.backend, repeat=args.repeat,
+                      memory=args.memory, log=sys.stdout)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1)
+        return 0 if all(result['converged'] for result in results['results']) else 1
+    if args.command == 'compare':
+        with open(args.old) as f:
+            old = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        rows, regressions = compare(old, new, threshold=args.threshold)
+        for row in rows:
+            case, buses, sparse, phase, time_ratio, memory_ratio = row
+            print('{:>6} {:>6} {:>6} {:>9} time x{:.2f} memory {}{}'.format(
+                case, buses, 'sparse' if sparse else 'dense', phase, time_ratio,
+                'n/a' if memory_ratio is None else 'x{:.2f}'.format(memory_ratio),
+                ' <- regression' if row in regressions else ''))
+        return 1 if regressions else 0
+    parser.print_help()
+    return 2
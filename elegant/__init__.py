@@ -1,7 +1,10 @@
 import os
 
+from .contingency import *
 from .core import *
 from .methods import *
+from .scenarios import *
+from .timeseries import *
 
 name = "elegant"
 PACKAGEDIR = os.path.abspath(os.path.dirname(__file__))
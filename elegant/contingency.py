@@ -0,0 +1,209 @@
+import numpy as np
+
+from .core import BranchFlows
+from .lazy import LazyModule
+from .methods import (SingularMatrixError, bus_types, chord_newton, factorize, newton_raphson,
+                      polar_jacobian, woodbury)
+
+nx = LazyModule('networkx')
+sparse = LazyModule('scipy.sparse')
+csgraph = LazyModule('scipy.sparse.csgraph')
+
+__all__ = ['n_minus_1', 'ContingencyResult']
+
+
+class ContingencyResult(object):
+    """Post-outage state of a PowerSystem for a set of branch outages
+
+    Row ``k`` describes the outage of branch ``outages[k]`` of the branch
+    table. Voltages follow ``system.buses`` and are zero for buses that are
+    not energized after the outage; flows follow the branch table and are
+    zero for the branch taken out.
+
+    Attributes
+    ----------
+    outages: array, shape (K,)
+        Branch table rows of the outaged branches
+    V: array, shape (K, N)
+        Post-outage bus voltages
+    S1, S2: array, shape (K, B)
+        Post-outage branch flows
+    loading: array, shape (K, B)
+        I/Imax of lines and S/Snom of transformers (%)
+    islanded: array, shape (K, N)
+        Buses disconnected from the slack buses by the outage
+    converged: array, shape (K,)
+        Whether the post-outage load flow converged
+    refactorized: array, shape (K,)
+        Whether the outage needed a new Jacobian factorization instead of
+        an update of the base-case one (islanding, slow convergence)
+    niter: array, shape (K,)
+        Number of load flow iterations
+    """
+    def __init__(self, outages, N, B):
+        K = len(outages)
+        self.outages = np.asarray(outages, int)
+        self.V = np.zeros((K, N), complex)
+        self.S1 = np.zeros((K, B), complex)
+        self.S2 = np.zeros((K, B), complex)
+        self.loading = np.zeros((K, B))
+        self.islanded = np.zeros((K, N), bool)
+        self.converged = np.zeros(K, bool)
+        self.refactorized = np.zeros(K, bool)
+        self.niter = np.zeros(K, int)
+
+    def __len__(self):
+        return self.outages.size
+
+    def violations(self, limit=100.):
+        """Overloaded branches as (outage row, branch row, loading) tuples"""
+        k, b = np.nonzero(self.loading > limit)
+        return [(int(self.outages[i]), int(j), float(self.loading[i, j])) for i, j in zip(k, b)]
+
+
+def bridge_rows(node1, node2):
+    graph = nx.Graph()
+    graph.add_edges_from(zip(node1, node2))
+    bridges = set(nx.bridges(graph))
+    pairs = [(a, b) if (a, b) in bridges else (b, a) for a, b in zip(node1, node2)]
+    parallel = {}
+    for pair in pairs:
+        parallel[pair] = parallel.get(pair, 0) + 1
+    return np.array([pair in bridges and parallel[pair] == 1 for pair in pairs], bool)
+
+
+def outage_admittance(Y, table, node1, node2, rows):
+    """Change of Ybus when the branches at the given table rows are taken out"""
+    rows = np.asarray(rows, int)
+    i, j = node1[rows], node2[rows]
+    ys = 1 / table.z[rows]
+    ysh = table.y[rows] / 2
+    M = Y.shape[0]
+    return sparse.coo_matrix((np.concatenate([-ys - ysh, -ys - ysh, ys, ys]),
+                              (np.concatenate([i, j, i, j]), np.concatenate([i, j, j, i]))),
+                             shape=(M, M)).tocsr()
+
+
+def slack_component(M, node1, node2, in_service, candidates):
+    """Buses still energized by the branches in service and the slack bus of each island
+
+    Every island holding one of the candidates (matrix indices in order of
+    preference, see Topology) stays energized, held by its first candidate.
+
+    Returns
+    -------
+    keep: array, shape (M,)
+        Mask of the energized buses
+    slacks: array of int
+        Slack bus of each energized island
+    """
+    adjacency = sparse.coo_matrix((np.ones(in_service.sum()),
+                                   (node1[in_service], node2[in_service])), shape=(M, M))
+    labels = csgraph.connected_components(adjacency, directed=False)[1]
+    first = np.unique(labels[candidates], return_index=True)[1]
+    slacks = candidates[np.sort(first)]
+    return np.isin(labels, labels[slacks]), slacks
+
+
+def n_minus_1(system, branches=None, eps=1e-10, Nmax=50):
+    """N-1 contingency analysis of the lines and transformers of a PowerSystem
+
+    The base-case Newton-Raphson Jacobian is factorized once. Taking a
+    branch out changes only the rows of its two end buses, so each outage
+    is solved with a Sherman-Morrison-Woodbury update of that factorization
+    and the exact post-outage power mismatches. Outages that disconnect
+    buses from the slack buses, or that do not converge with the updated
+    Jacobian, are solved again from scratch on the remaining network. An
+    island split off by an outage stays energized if it holds bus 0, a
+    designated slack bus or a generator, with the slack bus PowerSystem
+    would choose for it, starting from its base-case voltage.
+
+    Parameters
+    ----------
+    system: PowerSystem object
+    branches: list of TransmissionLine or Transformer objects, optional
+        Outages to study, defaults to every energized branch
+    eps: float, optional
+        Tolerance
+    Nmax: int, optional
+        Maximum number of iterations per outage
+
+    Returns
+    -------
+    result: ContingencyResult
+    """
+    buses = system.bus_table
+    table = system.branch_table
+    M = system.M
+    Y = system.Y
+    V0, S = system.flow_inputs()
+    base = newton_raphson(Y, V0, S, eps=eps, Nmax=Nmax)
+    if not base.converged:
+        raise ValueError("the base case load flow did not converge")
+    Vbase = base.V
+    pv, pq, slack = bus_types(S)
+    pvpq = np.sort(np.concatenate([pv, pq]))
+    unknowns = np.concatenate([pvpq, pq + M])
+    position = np.full(2 * M, -1)
+    position[unknowns] = np.arange(unknowns.size)
+    solve0 = factorize(polar_jacobian(Vbase, Y)[unknowns][:, unknowns])
+
+    node1 = buses.index[table.orig]
+    node2 = buses.index[table.dest]
+    energized = node1 >= 0
+    if branches is None:
+        outages = np.flatnonzero(energized)
+    else:
+        outages = np.array([table.row(branch) for branch in branches], int)
+    bridge = np.zeros(len(table), bool)
+    bridge[energized] = bridge_rows(node1[energized], node2[energized])
+    candidates = system.topology.candidates
+    result = ContingencyResult(outages, len(buses), len(table))
+
+    for k, row in enumerate(outages):
+        i, j = node1[row], node2[row]
+        keep = np.ones(M, bool)
+        Sk = S
+        outcome = base
+        if i >= 0:
+            dY = outage_admittance(Y, table, node1, node2, [row])
+            Yk = Y + dY if sparse.issparse(Y) else Y + dY.toarray()
+            outcome = None
+            if bridge[row]:
+                in_service = energized.copy()
+                in_service[row] = False
+                keep, slacks = slack_component(M, node1, node2, in_service, candidates)
+                Sk = S.copy()
+                Sk[slacks] = np.nan
+            else:
+                rows = position[[i, j, i + M, j + M]]
+                rows = np.unique(rows[rows >= 0])
+                C = polar_jacobian(Vbase, dY)[unknowns][:, unknowns][rows]
+                try:
+                    solve = woodbury(solve0, rows, C.toarray())
+                except SingularMatrixError:
+                    pass
+                else:
+                    outcome = chord_newton(Yk, Vbase, S, solve, eps=eps, Nmax=Nmax)
+            if outcome is None or not outcome.converged:
+                result.refactorized[k] = True
+                reduced = newton_raphson(Yk[keep][:, keep], Vbase[keep], Sk[keep],
+                                         eps=eps, Nmax=Nmax)
+                V = np.zeros(M, complex)
+                V[keep] = reduced.V
+                reduced.V = V
+                if outcome is not None:
+                    reduced.niter += outcome.niter
+                outcome = reduced
+        Vrows = np.zeros(len(buses), complex)
+        Vrows[buses.energized] = outcome.V[buses.index[buses.energized]]
+        flows = BranchFlows(Vrows, table)
+        flows.S1[row] = flows.S2[row] = flows.loading[row] = 0.
+        result.V[k] = Vrows
+        result.S1[k] = flows.S1
+        result.S2[k] = flows.S2
+        result.loading[k] = flows.loading
+        result.islanded[k, buses.energized] = ~keep[buses.index[buses.energized]]
+        result.converged[k] = outcome.converged
+        result.niter[k] = outcome.niter
+    return result
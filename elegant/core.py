@@ -1,7 +1,18 @@
-import networkx as nx
+import functools
+import itertools
+import os
+import time
+import weakref
+
 import numpy as np
 
-from .methods import newton_raphson, short
+from .lazy import LazyModule
+from .methods import bus_types, dc_flow, factorize, fast_decoupled, gauss_seidel, newton_raphson, \
+    short, warm_start
+
+nx = LazyModule('networkx')
+sparse = LazyModule('scipy.sparse')
+csgraph = LazyModule('scipy.sparse.csgraph')
 
 
 def gmean(arr):
@@ -20,8 +31,144 @@ STAR = 0
 EARTH = 1
 DELTA = 2
 
+_UNSET = object()
+# unique revision numbers, next() on a count being atomic under the GIL
+REVISIONS = itertools.count(1)
+# changes of a solved quantity below which update() keeps the stored value
+SETTLED = 1e-10
+
+
+def solve_island(Y, V0, S0, Bp=None, Bpp=None, method='newton', Nmax=100, gs_sweeps=0,
+                 callback=None, eps=1e-12):
+    """Load flow of one island, see PowerSystem.update_flow"""
+    if gs_sweeps > 0:
+        V0 = gauss_seidel(Y, V0, S0, Niter=gs_sweeps, Nmax=gs_sweeps).V
+    if method == 'newton':
+        return newton_raphson(Y, V0, S0, eps=eps, Nmax=Nmax, callback=callback)
+    if method == 'gauss_seidel':
+        return gauss_seidel(Y, V0, S0, eps=eps, Nmax=Nmax, callback=callback)
+    return fast_decoupled(Y, V0, S0, Bp, Bpp, eps=eps, Nmax=Nmax, callback=callback)
+
+
+def settle(element, name, value):
+    """Stores a solved value unless it is within SETTLED of the stored one, so that
+    re-solving an unchanged network does not invalidate the cached matrices"""
+    if not abs(getattr(element, name) - value) <= SETTLED:
+        setattr(element, name, value)
+
+
+def derived(method):
+    """Property computed once per element and kept until a tracked attribute changes
+
+    The values are kept in a ``_cache`` dict, only created the first time one
+    is asked for, so that elements whose parameters are never read directly
+    stay small.
+    """
+    name = method.__name__
+
+    def fget(self):
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        except AttributeError:
+            object.__setattr__(self, '_cache', {})
+        value = self._cache[name] = method(self)
+        return value
+
+    fget.__doc__ = method.__doc__
+    return property(fget)
+
+
+class Element(object):
+    """Network element whose electrical attributes are tracked
+
+    Assigning a new value to one of the attributes listed in ``_tracked``
+    gives a new ``_kind`` revision to every PowerSystem watching the element,
+    which is what they use to tell whether their cached matrices are still
+    valid, and drops the ``derived`` parameters cached on the element itself.
+    The watching systems are held in ``_owners`` by weak reference, a single
+    one on its own (weakref.ref shares it among all the elements of a
+    system) and several in a tuple.
+    """
+    __slots__ = ()
+    _tracked = frozenset()
+    _kind = None
+
+    def __setattr__(self, name, value):
+        if name in self._tracked and getattr(self, name, _UNSET) != value:
+            owners = getattr(self, '_owners', None)
+            if owners is not None:
+                revision = next(REVISIONS)
+                for owner in owners if isinstance(owners, tuple) else (owners,):
+                    system = owner()
+                    if system is not None:
+                        system.revisions[self._kind] = revision
+            cache = getattr(self, '_cache', None)
+            if cache:
+                cache.clear()
+        object.__setattr__(self, name, value)
+
+    def watch(self, system):
+        """Makes changes to the tracked attributes invalidate the matrices of system"""
+        owner = weakref.ref(system)
+        owners = getattr(self, '_owners', None)
+        if owners is None or owners is owner:
+            object.__setattr__(self, '_owners', owner)
+            return
+        owners = owners if isinstance(owners, tuple) else (owners,)
+        if owner not in owners:
+            owners = tuple(other for other in owners if other() is not None) + (owner,)
+            object.__setattr__(self, '_owners', owners[0] if len(owners) == 1 else owners)
+
+    def __getstate__(self):
+        state = dict(getattr(self, '__dict__', {}))
+        state.pop('_owners', None)
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if name not in ('_cache', '_owners') and hasattr(self, name):
+                    state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            state = dict(state[0] or {}, **(state[1] or {}))
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+
+FAULTS = {'iTPG': (0, 0), 'iSLG': (1, 0), 'iDLGb': (2, 1), 'iDLGc': (2, 2), 'iLL': (3, 1)}
+
+
+def fault_current(name):
+    """Bus fault current read from the short-circuit results of the system that
+    last solved the bus, computed the first time any bus asks for them (zero if
+    the bus is on a dead island)"""
+    fault, phase = FAULTS[name]
+
+    def fget(self):
+        system = self.__dict__.get('_faults')
+        if system is None:
+            return self.__dict__.get(name)
+        if self.bus_id in system.hsh:
+            return system.short_circuit()[system.hsh[self.bus_id], fault, phase]
+        return 0.
+
+    def fset(self, value):
+        if self.__dict__.get('_faults') is not None:
+            currents = {other: getattr(self, other) for other in FAULTS}
+            self.__dict__.update(currents)
+            self.__dict__['_faults'] = None
+        self.__dict__[name] = value
+
+    return property(fget, fset)
+
+
+class Bus(Element):
+    _kind = 'bus'
+    _tracked = frozenset(['v', 'delta', 'pg', 'qg', 'pl', 'ql', 'xd',
+                          'gen_ground', 'load_ground'])
 
-class Bus(object):
     def __init__(self, bus_id, v=1.0, delta=0.0, pg=0.0, qg=0.0, pl=0.0, ql=0.0,
                  xd=np.inf, iTPG=None, iSLG=None, iDLGb=None, iDLGc=None, iLL=None,
                  gen_ground=False, load_ground=EARTH):
@@ -41,6 +188,12 @@ class Bus(object):
         self.gen_ground = gen_ground
         self.load_ground = load_ground
 
+    iTPG = fault_current('iTPG')
+    iSLG = fault_current('iSLG')
+    iDLGb = fault_current('iDLGb')
+    iDLGc = fault_current('iDLGc')
+    iLL = fault_current('iLL')
+
     @property
     def P(self):
         return self.pg - self.pl
@@ -56,7 +209,13 @@ class Bus(object):
         return np.inf
 
 
-class TransmissionLine(object):
+class TransmissionLine(Element):
+    __slots__ = ('orig', 'dest', 'ell', 'r', 'd12', 'd23', 'd31', 'd', 'rho', 'm',
+                 'z', 'y', 'vbase', 'imax', 'v1', 'v2', '_cache', '_owners')
+    _kind = 'line'
+    _tracked = frozenset(['orig', 'dest', 'ell', 'r', 'd12', 'd23', 'd31', 'd',
+                          'rho', 'm', 'z', 'y', 'vbase', 'imax'])
+
     def __init__(self, orig, dest,
                  ell=10e3, r=1e-2, d12=1, d23=1, d31=1, d=0.5, rho=1.78e-8, m=1,
                  vbase=1e4, imax=np.inf, v1=0., v2=0., z=None, y=None):
@@ -88,7 +247,12 @@ class TransmissionLine(object):
                     m=self.m,
                     imax=self.imax)
 
-    @property
+    @param.setter
+    def param(self, param):
+        for name, value in param.items():
+            setattr(self, name, value)
+
+    @derived
     def Rm(self):
         if (self.z, self.y) == (None, None):
             if self.m == 1:
@@ -102,7 +266,7 @@ class TransmissionLine(object):
             else:
                 return np.nan
 
-    @property
+    @derived
     def Rb(self):
         if (self.z, self.y) == (None, None):
             if self.m == 1:
@@ -116,7 +280,7 @@ class TransmissionLine(object):
             else:
                 return np.nan
 
-    @property
+    @derived
     def Z(self):
         if (self.z, self.y) == (None, None):
             R = self.rho * self.ell / (self.m * PI * self.r ** 2)
@@ -125,7 +289,7 @@ class TransmissionLine(object):
         else:
             return self.z
 
-    @property
+    @derived
     def Zpu(self):
         return self.Z / (self.vbase ** 2 / 1e8)
 
@@ -133,7 +297,7 @@ class TransmissionLine(object):
     def Z(self, z):
         self.z = z
 
-    @property
+    @derived
     def Y(self):
         if (self.z, self.y) == (None, None):
             C = 2 * PI * EPS / np.log(gmean([self.d12, self.d23, self.d31]) / self.Rb) * self.ell
@@ -141,7 +305,7 @@ class TransmissionLine(object):
         else:
             return self.y
 
-    @property
+    @derived
     def Ypu(self):
         return self.Y * (self.vbase ** 2 / 1e8)
 
@@ -149,24 +313,26 @@ class TransmissionLine(object):
     def Y(self, y):
         self.y = y
 
-    @property
+    @derived
     def gamma(self):
         return np.sqrt(self.Z * self.Y)
 
-    @property
+    @derived
     def Zc(self):
         return np.sqrt(self.Z / self.Y)
 
-    @property
+    @derived
     def Zcpu(self):
         return np.sqrt(self.Zpu / self.Ypu)
 
-    @property
+    @derived
     def Tpu(self):
         A = (self.Zpu * self.Ypu / 2 + 1)
         B = self.Zpu
         C = self.Ypu * (1 + self.Zpu * self.Ypu / 4)
-        return np.array([[A, B], [C, A]])
+        T = np.array([[A, B], [C, A]])
+        T.flags.writeable = False
+        return T
 
     @property
     def Ipu(self):
@@ -211,7 +377,12 @@ class TransmissionLine(object):
         return P2 + 1j * Q2
 
 
-class Transformer(object):
+class Transformer(Element):
+    __slots__ = ('orig', 'dest', 'snom', 'jx0', 'jx1', 'primary', 'secondary',
+                 'v1', 'v2', '_cache', '_owners')
+    _kind = 'trafo'
+    _tracked = frozenset(['orig', 'dest', 'snom', 'jx0', 'jx1', 'primary', 'secondary'])
+
     def __init__(self, orig, dest,
                  snom=1e8, jx0=0.5, jx1=0.5, primary=STAR, secondary=STAR,
                  v1=0., v2=0.):
@@ -225,11 +396,11 @@ class Transformer(object):
         self.v1 = v1
         self.v2 = v2
 
-    @property
+    @derived
     def Z0(self):
         return self.jx0 * 1e8j / self.snom
 
-    @property
+    @derived
     def Z1(self):
         return self.jx1 * 1e8j / self.snom
 
@@ -267,15 +438,378 @@ class Keys:
         return self.keys[extremities][path]
 
 
+class BusTable(object):
+    """Structure-of-arrays view of the buses of a PowerSystem
+
+    Rows follow ``PowerSystem.buses``. ``index`` holds the position of each
+    bus in the network matrices, or -1 if the bus is not energized, and
+    ``slack`` flags the slack bus of each island.
+    """
+    def __init__(self, buses, hsh, slacks):
+        self.bus_id = np.array([bus.bus_id for bus in buses], int)
+        self.v = np.array([bus.v for bus in buses], float)
+        self.delta = np.array([bus.delta for bus in buses], float)
+        self.pg = np.array([bus.pg for bus in buses], float)
+        self.qg = np.array([bus.qg for bus in buses], float)
+        self.pl = np.array([bus.pl for bus in buses], float)
+        self.ql = np.array([bus.ql for bus in buses], float)
+        self.xd = np.array([bus.xd for bus in buses], float)
+        self.gen_ground = np.array([bool(bus.gen_ground) for bus in buses], bool)
+        self.load_ground = np.array([bus.load_ground for bus in buses], int)
+        self.index = np.array([hsh.get(bus.bus_id, -1) for bus in buses], int)
+        self.slack = np.isin(self.index, slacks)
+
+    def __len__(self):
+        return self.bus_id.size
+
+    @property
+    def V(self):
+        return self.v * np.exp(1j * self.delta)
+
+    @property
+    def energized(self):
+        return self.index >= 0
+
+    def flow_inputs(self, pl=None, ql=None, pg=None):
+        """Initial voltages and specified powers, see PowerSystem.flow_inputs"""
+        energized = self.energized
+        node = self.index[energized]
+        M = node.size
+        pl = (self.pl if pl is None else np.asarray(pl, float))[energized]
+        ql = (self.ql if ql is None else np.asarray(ql, float))[energized]
+        pg = (self.pg if pg is None else np.asarray(pg, float))[energized]
+        slack = self.slack[energized]
+        pv = ~slack & (pg > 0)
+        V0 = np.zeros(M, complex)
+        S0 = np.zeros((M, 2))
+        V0[node] = np.where(slack, self.V[energized], np.where(pv, self.v[energized], 1.))
+        S0[node, 0] = np.where(slack, np.nan, np.where(pv, pg - pl, -pl))
+        S0[node, 1] = np.where(slack | pv, np.nan, -ql)
+        return V0, S0
+
+
+class BranchTable(object):
+    """Structure-of-arrays view of the lines and transformers of a PowerSystem
+
+    Rows are the lines followed by the transformers. ``orig`` and ``dest``
+    are row numbers in the BusTable, ``z``/``z0`` the positive/zero-sequence
+    series impedances and ``y`` the total shunt admittance, all in pu.
+    Grounding codes are -1 for lines; ``imax`` is infinite for transformers
+    and ``snom`` is NaN for lines.
+    """
+    def __init__(self, lines, trafos, buses):
+        position = {bus: k for k, bus in enumerate(buses)}
+        branches = list(lines) + list(trafos)
+        self.is_trafo = np.array([False] * len(lines) + [True] * len(trafos), bool)
+        self.orig = np.array([position[b.orig] for b in branches], int)
+        self.dest = np.array([position[b.dest] for b in branches], int)
+        self.z = np.array([line.Zpu for line in lines] + [trafo.Z1 for trafo in trafos],
+                          complex)
+        self.z0 = np.array([line.Zpu for line in lines] + [trafo.Z0 for trafo in trafos],
+                           complex)
+        self.y = np.array([line.Ypu for line in lines] + [0.] * len(trafos), complex)
+        self.primary = np.array([-1] * len(lines) + [trafo.primary for trafo in trafos], int)
+        self.secondary = np.array([-1] * len(lines) + [trafo.secondary for trafo in trafos],
+                                  int)
+        self.vbase = np.array([line.vbase for line in lines] + [np.nan] * len(trafos), float)
+        self.imax = np.array([line.imax for line in lines] + [np.inf] * len(trafos), float)
+        self.snom = np.array([np.nan] * len(lines) + [trafo.snom for trafo in trafos], float)
+        self.rows = {branch: k for k, branch in enumerate(branches)}
+
+    def __len__(self):
+        return self.orig.size
+
+    def row(self, branch):
+        """Row of a TransmissionLine or Transformer object in the table"""
+        return self.rows[branch]
+
+
+class BranchFlows(object):
+    """Power flow results of every line and transformer of a PowerSystem
+
+    Rows follow the BranchTable and ``V`` holds the voltage of each row of
+    the BusTable (zero if not energized). ``S1`` and ``S2`` are the complex powers
+    leaving the origin bus and arriving at the destination bus, ``Sper`` the
+    losses and ``Ipu`` the series current, all in pu; ``Ia`` is the line
+    current in A (NaN for transformers) and ``loading`` is I/Imax for lines
+    and S/Snom for transformers, in %.
+    """
+    def __init__(self, V, branches):
+        v1 = V[branches.orig]
+        v2 = V[branches.dest]
+        z = branches.z
+        y = np.abs(branches.y)
+        A = z * branches.y / 2 + 1
+        self.Ipu = (v1 - A * v2) / z
+        self.Ia = np.full_like(self.Ipu, np.nan)
+        lines = ~branches.is_trafo
+        self.Ia[lines] = self.Ipu[lines] * 1e8 / branches.vbase[lines]
+        self.S1 = (np.abs(v1) ** 2 - v1 * v2.conj()) / z.conj() - 1j * np.abs(v1) ** 2 * y / 2
+        self.S2 = (v2 * v1.conj() - np.abs(v2) ** 2) / z.conj() + 1j * np.abs(v2) ** 2 * y / 2
+        self.Sper = self.S1 - self.S2
+        self.loading = np.where(branches.is_trafo,
+                                np.abs(self.S2) * 1e8 / branches.snom,
+                                np.abs(self.Ia) / branches.imax) * 100
+        self.row = branches.row
+
+    def __len__(self):
+        return self.S1.size
+
+
+class Topology(object):
+    """Connectivity index of a PowerSystem
+
+    Labels the connected components of the network graph once. Every island
+    holding bus 0, a bus designated with ``PowerSystem.set_slack`` or a
+    generator (pg > 0) is energized, with bus 0, the designated bus or the
+    largest generator as its slack bus, in this order of preference. Keeps
+    the energized buses, lines and transformers, the bus_id -> matrix index
+    map, the matrix indices of each island and its slack bus, the buses of
+    the dead islands and, in ``candidates``, the matrix indices of every
+    bus able to hold an island in order of preference, from which the
+    islands split off by an outage take their slack bus.
+    """
+    def __init__(self, system):
+        nodes = list(system.graph.nodes)
+        position = {node: k for k, node in enumerate(nodes)}
+        edges = np.array([[position[u], position[v]] for u, v in system.graph.edges()],
+                         int).reshape(-1, 2)
+        adjacency = sparse.coo_matrix((np.ones(len(edges)), (edges[:, 0], edges[:, 1])),
+                                      shape=(len(nodes), len(nodes)))
+        _, labels = csgraph.connected_components(adjacency, directed=False)
+        self.labels = {node: labels[position[node]] for node in nodes}
+
+        def preference(bus):
+            return bus.bus_id != 0, bus not in system.slacks, -bus.pg
+
+        ranked = sorted(self.sources(system), key=preference)
+        slack = {}
+        for bus in ranked:
+            slack.setdefault(self.labels[bus], bus)
+        self.live = frozenset(slack)
+        energized = set(node for node in nodes if self.labels[node] in self.live)
+        self.buses = self.select(system.buses, lambda bus: bus in energized)
+        self.lines = self.select(system.lines, lambda line: line.orig in energized)
+        self.trafos = self.select(system.trafos, lambda trafo: trafo.orig in energized)
+        self.dead = self.select(system.buses, lambda bus: bus not in energized)
+        self.hsh = {bus.bus_id: j for j, bus in enumerate(self.buses)}
+        island = np.array([self.labels[bus] for bus in self.buses], int)
+        order = list(dict.fromkeys(island.tolist()))
+        self.islands = [np.flatnonzero(island == label) for label in order]
+        self.slacks = np.array([self.hsh[slack[label].bus_id] for label in order], int)
+        self.candidates = np.array([self.hsh[bus.bus_id] for bus in ranked], int)
+
+    def sources(self, system):
+        """Buses able to hold the voltage of their island"""
+        return [bus for bus in system.buses
+                if bus in self.labels and (bus.bus_id == 0 or bus in system.slacks or bus.pg > 0)]
+
+    def live_islands(self, system):
+        """Labels of the islands energized with the current generation"""
+        return frozenset(self.labels[bus] for bus in self.sources(system))
+
+    @staticmethod
+    def select(elements, condition):
+        selected = np.array([x for x in elements if condition(x)])
+        selected.flags.writeable = False
+        return selected
+
+
+class Phase(object):
+    """Times one run of a phase and hands it to a SolveStats"""
+    __slots__ = ('stats', 'name', 'size', 'start')
+
+    def __init__(self, stats, name, size):
+        self.stats = stats
+        self.name = name
+        self.size = size
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.record(self.name, time.perf_counter() - self.start, self.size)
+
+
+class NoPhase(object):
+    """Stands for a Phase when the system is not instrumented"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NO_PHASE = NoPhase()
+
+
+class SolveStats(object):
+    """Wall time, call count and matrix size of the phases of the solves of a PowerSystem
+
+    The phases nest: ``update`` includes ``update_flow``, which includes
+    ``ybus`` and ``solve``, and so on.
+
+    Attributes
+    ----------
+    time: dict
+        Total wall time (s) of each phase
+    calls: dict
+        Number of runs of each phase
+    size: dict
+        Size of the matrices (or number of faulted buses) of the last run
+    callback: callable, optional
+        Called as ``callback(name, elapsed, size)`` after each run
+    """
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.time = {}
+        self.calls = {}
+        self.size = {}
+
+    def phase(self, name, size=None):
+        return Phase(self, name, size)
+
+    def record(self, name, elapsed, size=None):
+        self.time[name] = self.time.get(name, 0.) + elapsed
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.size[name] = size
+        if self.callback is not None:
+            self.callback(name, elapsed, size)
+
+    def reset(self):
+        self.time.clear()
+        self.calls.clear()
+        self.size.clear()
+
+    def __str__(self):
+        lines = ['{:<16} {:>6} {:>10} {:>10} {:>6}'.format('phase', 'calls', 'total(s)',
+                                                           'mean(ms)', 'size')]
+        for name, total in self.time.items():
+            size = self.size[name]
+            lines.append('{:<16} {:>6d} {:>10.4f} {:>10.3f} {:>6}'.format(
+                name, self.calls[name], total, 1e3 * total / self.calls[name],
+                '' if size is None else size))
+        return '\n'.join(lines)
+
+
+def instrumented(method):
+    """Records each call of a PowerSystem method as a phase named after it"""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.stats is None:
+            return method(self, *args, **kwargs)
+        with self.stats.phase(name):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
 class PowerSystem(object):
-    def __init__(self):
+    sparse = False
+    topology_revision = 0
+    _matrices = None
+    _solution = None
+    slacks = ()
+    stats = None
+    solver_results = None
+    unsolved = None
+
+    def __init__(self, sparse=False):
+        self.sparse = sparse
         self.buses = []
         self.lines = []
         self.trafos = []
+        self.slacks = []
+        self.revisions = {}
         self.keys = Keys()
         self.graph = nx.MultiGraph()
         self.status = ""
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_matrices', None)
+        state.pop('stats', None)
+        state.pop('solver_results', None)
+        state.pop('unsolved', None)
+        state.pop('revisions', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.revisions = {}
+
+    def instrument(self, callback=None):
+        """Starts recording the phases of update, update_flow and update_short
+
+        Parameters
+        ----------
+        callback: callable, optional
+            Called as ``callback(name, elapsed, size)`` after each phase
+
+        Returns
+        -------
+        stats: SolveStats
+            Collects the phases until ``stats`` is set back to None
+        """
+        self.stats = SolveStats(callback)
+        return self.stats
+
+    def phase(self, name, size=None):
+        """Context timing a phase of a solve, doing nothing unless instrumented"""
+        if self.stats is None:
+            return NO_PHASE
+        return self.stats.phase(name, size)
+
+    def profile(self, filename=None, **kwargs):
+        """Runs update under cProfile
+
+        Parameters
+        ----------
+        filename: str, optional
+            Where to dump the profile, for pstats or snakeviz
+        **kwargs
+            Passed to update
+
+        Returns
+        -------
+        stats: pstats.Stats
+        """
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.runcall(self.update, **kwargs)
+        if filename is not None:
+            profiler.dump_stats(filename)
+        return pstats.Stats(profiler)
+
+    def touch(self):
+        """Marks the network topology as changed"""
+        self.topology_revision += 1
+
+    def cached(self, name, key, build):
+        """Returns the matrix stored under name if it was built for key"""
+        # reading the topology first catches islands energized or killed since
+        self.topology
+        return self.memo(name, key, build)
+
+    def memo(self, name, key, build):
+        """Like cached, without checking the topology"""
+        if self._matrices is None:
+            self._matrices = {}
+        key = (self.topology_revision, self.sparse) + key
+        if name in self._matrices and self._matrices[name][0] == key:
+            return self._matrices[name][1]
+        A = build()
+        if isinstance(A, np.ndarray):
+            A.flags.writeable = False
+        self._matrices[name] = (key, A)
+        return A
+
     def add_bus(self):
         if 0 not in [bus.bus_id for bus in self.buses] or self.N == 0:
             bus = Bus(bus_id=0)
@@ -286,6 +820,7 @@ class PowerSystem(object):
             self.status = "Inserted bus"
         self.sort_buses()
         self.graph.add_node(bus)
+        self.touch()
         return bus
 
     def add_line(self, line, path=None):
@@ -299,6 +834,7 @@ class PowerSystem(object):
         path = self.graph.add_edge(line.orig, line.dest, path)
         extremities = frozenset([line.orig, line.dest])
         self.keys.add_keyobj(extremities, path, line)
+        self.touch()
 
     def id2n(self, k):
         for n, bus in enumerate(self.buses):
@@ -310,7 +846,22 @@ class PowerSystem(object):
         self.remove_elements_linked_to(bus)
         self.graph.remove_node(bus)
         self.buses.remove(bus)
+        if bus in self.slacks:
+            self.slacks.remove(bus)
         self.sort_buses()
+        self.touch()
+
+    def set_slack(self, bus, slack=True):
+        """Designates bus as the slack bus of its island, unless it is the island of bus 0
+
+        Islands without bus 0 or a designated bus are held by their largest
+        generator.
+        """
+        slacks = [other for other in self.slacks if other is not bus]
+        if slack:
+            slacks.append(bus)
+        self.slacks = slacks
+        self.touch()
 
     def add_trafo(self, trafo, path=None):
         if (trafo.orig, trafo.dest, path) in self.graph.edges:
@@ -323,6 +874,7 @@ class PowerSystem(object):
         path = self.graph.add_edge(trafo.orig, trafo.dest, path)
         extremities = frozenset([trafo.orig, trafo.dest])
         self.keys.add_keyobj(extremities, path, trafo)
+        self.touch()
 
     def remove_line(self, line, key=None):
         if key is not None and (line.orig, line.dest, key) not in self.graph.edges:
@@ -330,6 +882,7 @@ class PowerSystem(object):
             return
         self.lines.remove(line)
         self.graph.remove_edge(line.orig, line.dest, key)
+        self.touch()
         self.status = "removed line"
 
     def remove_trafo(self, trafo, key=None):
@@ -338,6 +891,7 @@ class PowerSystem(object):
             return
         self.trafos.remove(trafo)
         self.graph.remove_edge(trafo.orig, trafo.dest, key)
+        self.touch()
         self.status = "removed transformer"
 
     def sort_buses(self):
@@ -371,219 +925,499 @@ class PowerSystem(object):
     def N(self):
         return len(self.buses)
 
+    @property
+    def topology(self):
+        topology = self.memo('topology', (), self.index)
+        live = self.memo('live', self.bus_revision[:1], lambda: topology.live_islands(self))
+        if live != topology.live:
+            # a generator switched on or off energizes or kills a whole island
+            self.touch()
+            topology = self.memo('topology', (), self.index)
+        return topology
+
+    def index(self):
+        """Topology of the system, watching every element for changes"""
+        for element in itertools.chain(self.buses, self.lines, self.trafos):
+            element.watch(self)
+        return Topology(self)
+
     @property
     def M(self):
-        buses = self.masked_buses
-        return len(buses)
+        return len(self.topology.buses)
 
     @property
     def good_ids(self):
-        buses = self.masked_buses
-        good_ids = [bus.bus_id for bus in buses]
-        return good_ids
+        return list(self.topology.hsh)
 
     @property
     def hsh(self):
-        good_ids = self.good_ids
-        hsh = {}
-        for j, i in enumerate(good_ids):
-            hsh[i] = j
-        return hsh
+        return self.topology.hsh
 
     @property
     def masked_buses(self):
-        neighbors = []
-        connected_components = nx.connected_components(self.graph)
-        for component in connected_components:
-            component_ids = [b.bus_id for b in component]
-            if 0 in component_ids:  # and 0 in [b.bus_id for b in self.buses]
-                neighbors = component_ids
-        mask_buses = np.zeros(self.N, bool)
-        if np.size(mask_buses):
-            mask_buses[list(neighbors)] = True
-        if self.N > 0:
-            masked_buses = np.array(self.buses)[mask_buses]
-        else:
-            masked_buses = np.array([])
-        return masked_buses
+        return self.topology.buses
 
     @property
     def masked_lines(self):
-        good_ids = self.good_ids
-        mask_lines = np.ones(len(self.lines), bool)
-        for i in range(len(self.lines)):
-            line = self.lines[i]
-            if line.orig.bus_id not in good_ids:
-                mask_lines[i] = False
-        if len(self.lines) > 0:
-            masked_lines = np.array(self.lines)[mask_lines]
-        else:
-            masked_lines = np.array([])
-        return masked_lines
+        return self.topology.lines
 
     @property
     def masked_trafos(self):
-        good_ids = self.good_ids
-        mask_trafos = np.ones(len(self.trafos), bool)
-        for i in range(len(self.trafos)):
-            trafo = self.trafos[i]
-            if trafo.orig.bus_id not in good_ids:
-                mask_trafos[i] = False
-        if len(self.trafos) > 0:
-            masked_trafos = np.array(self.trafos)[mask_trafos]
-        else:
-            masked_trafos = np.array([])
-        return masked_trafos
+        return self.topology.trafos
 
     @property
-    def Y(self):
+    def dead_buses(self):
+        """Buses of the islands without bus 0, a designated slack bus or a generator"""
+        return self.topology.dead
+
+    @property
+    def bus_table(self):
+        return self.cached('bus_table', self.bus_revision,
+                           lambda: BusTable(self.buses, self.hsh, self.topology.slacks))
+
+    @property
+    def branch_table(self):
+        return self.cached('branch_table', self.branch_revision,
+                           lambda: BranchTable(self.lines, self.trafos, self.buses))
+
+    def branch_flows(self):
+        """Flows, losses, currents and loadings of all branches from the bus voltages"""
+        buses = self.bus_table
+        return self.cached('flows', self.bus_revision,
+                           lambda: BranchFlows(np.where(buses.energized, buses.V, 0.),
+                                               self.branch_table))
+
+    def matrix(self, rows, cols, data):
+        """Builds an M x M matrix summing data over repeated (row, col) entries"""
         N = self.M
-        hsh = self.hsh
-        lines = self.masked_lines
-        trafos = self.masked_trafos
-        Y = np.zeros((N, N), complex)
-        for line in lines:
-            node1 = hsh[line.orig.bus_id]
-            node2 = hsh[line.dest.bus_id]
-            Y[node1, node1] += 1 / line.Zpu + line.Ypu / 2
-            Y[node2, node2] += 1 / line.Zpu + line.Ypu / 2
-            Y[node1, node2] -= 1 / line.Zpu
-            Y[node2, node1] -= 1 / line.Zpu
-        for trafo in trafos:
-            node1 = hsh[trafo.orig.bus_id]
-            node2 = hsh[trafo.dest.bus_id]
-            Y[node1, node1] += 1 / trafo.Z1
-            Y[node2, node2] += 1 / trafo.Z1
-            Y[node1, node2] -= 1 / trafo.Z1
-            Y[node2, node1] -= 1 / trafo.Z1
-        return Y
+        A = sparse.coo_matrix((data, (rows, cols)), shape=(N, N)).tocsr()
+        if self.sparse:
+            return A
+        return A.toarray()
+
+    def energized_branches(self):
+        """Matrix indices of both ends of the energized branches"""
+        buses = self.bus_table
+        branches = self.branch_table
+        node1 = buses.index[branches.orig]
+        node2 = buses.index[branches.dest]
+        mask = node1 >= 0
+        return branches, mask, node1[mask], node2[mask]
+
+    @property
+    def branch_revision(self):
+        return self.revisions.get('line', 0), self.revisions.get('trafo', 0)
+
+    @property
+    def bus_revision(self):
+        return (self.revisions.get('bus', 0),) + self.branch_revision
+
+    def branch_admittance(self, resistance=True, charging=True):
+        """Positive-sequence admittance matrix of the branches
+
+        The matrix is cached until the topology or a branch parameter changes
+        and must be treated as read-only.
+
+        Parameters
+        ----------
+        resistance: bool, optional
+            Whether to keep the series resistance of the lines
+        charging: bool, optional
+            Whether to keep the shunt admittance of the lines
+        """
+        return self.cached('branch', self.branch_revision + (resistance, charging),
+                           lambda: self.assemble_branches(resistance, charging))
+
+    def assemble_branches(self, resistance=True, charging=True):
+        branches, mask, node1, node2 = self.energized_branches()
+        z = branches.z[mask]
+        if not resistance:
+            z = 1j * z.imag
+        ys = 1 / z
+        ysh = branches.y[mask] / 2 if charging else np.zeros_like(ys)
+        rows = np.concatenate([node1, node2, node1, node2])
+        cols = np.concatenate([node1, node2, node2, node1])
+        data = np.concatenate([ys + ysh, ys + ysh, -ys, -ys])
+        return self.matrix(rows, cols, data)
+
+    def decoupled_matrices(self, variant='XB'):
+        """Constant B' and B'' matrices of the fast-decoupled load flow
+
+        Parameters
+        ----------
+        variant: {'XB', 'BX'}, optional
+            XB neglects the series resistance in B', BX neglects it in B''.
+            Line charging is only kept in B''.
+        """
+        if variant not in ('XB', 'BX'):
+            raise ValueError("variant must be 'XB' or 'BX'")
+        Bp = self.cached("B'", self.branch_revision + (variant,),
+                         lambda: -self.assemble_branches(resistance=variant == 'BX',
+                                                         charging=False).imag)
+        Bpp = self.cached("B''", self.branch_revision + (variant,),
+                          lambda: -self.assemble_branches(resistance=variant == 'XB').imag)
+        return Bp, Bpp
+
+    @property
+    def Y(self):
+        return self.branch_admittance()
+
+    def dc_matrices(self):
+        """Susceptance matrices of the DC load flow
+
+        Returns
+        -------
+        Bf: array or sparse matrix, shape (B, M)
+            Gives the active power flow of each branch from the bus angles
+        Bbus: array or sparse matrix, shape (M, M)
+            Bus susceptance matrix
+        """
+        return self.cached('dc', self.branch_revision, self.assemble_dc)
+
+    def assemble_dc(self):
+        branches, mask, node1, node2 = self.energized_branches()
+        rows = np.flatnonzero(mask)
+        b = 1 / branches.z[mask].imag
+        Bf = sparse.coo_matrix((np.concatenate([b, -b]),
+                                (np.concatenate([rows, rows]), np.concatenate([node1, node2]))),
+                               shape=(len(branches), self.M)).tocsr()
+        Bbus = self.matrix(np.concatenate([node1, node2, node1, node2]),
+                           np.concatenate([node1, node2, node2, node1]),
+                           np.concatenate([b, b, -b, -b])).real
+        if not self.sparse:
+            Bf = Bf.toarray()
+        return Bf, Bbus
+
+    def dc_flow(self, P=None):
+        """Solves the DC load flow of the energized islands
+
+        Parameters
+        ----------
+        P: array, shape (M,), optional
+            Active power injections, defaulting to pg - pl of each bus
+
+        Returns
+        -------
+        theta: array, shape (M,)
+            Bus voltage angles (rad)
+        flows: array, shape (B,)
+            Active power flow of each branch, following the branch table
+        """
+        if P is None:
+            buses = self.bus_table
+            energized = buses.energized
+            P = np.zeros(self.M)
+            P[buses.index[energized]] = (buses.pg - buses.pl)[energized]
+        Bf, Bbus = self.dc_matrices()
+        theta = dc_flow(Bbus, np.asarray(P, float), slack=self.topology.slacks)
+        return theta, Bf.dot(theta)
+
+    @property
+    def ptdf(self):
+        """Power transfer distribution factors, shape (B, M)
+
+        Change of the flow of each branch when one pu is injected at a bus
+        and withdrawn at the slack bus of its island.
+        """
+        return self.cached('ptdf', self.branch_revision, self.assemble_ptdf)
+
+    def assemble_ptdf(self):
+        Bf, Bbus = self.dc_matrices()
+        others = np.delete(np.arange(self.M), self.topology.slacks)
+        H = np.zeros((Bf.shape[0], self.M))
+        if others.size > 0:
+            BfT = Bf.T[others]
+            if sparse.issparse(BfT):
+                BfT = BfT.toarray()
+            H[:, others] = factorize(Bbus[others][:, others])(BfT).T
+        return H
+
+    @property
+    def lodf(self):
+        """Line outage distribution factors, shape (B, B)
+
+        Column k is the change of the flow of each branch per unit of the
+        pre-outage flow of branch k when k is taken out. The columns of
+        outages that island part of the network are NaN.
+        """
+        return self.cached('lodf', self.branch_revision, self.assemble_lodf)
+
+    def assemble_lodf(self):
+        H = self.ptdf
+        branches, mask, node1, node2 = self.energized_branches()
+        Hb = np.zeros((len(branches), len(branches)))
+        Hb[:, mask] = H[:, node1] - H[:, node2]
+        denominator = 1 - np.diag(Hb)
+        islanding = np.abs(denominator) < 1e-10
+        L = Hb / np.where(islanding, 1., denominator)
+        L[:, islanding] = np.nan
+        np.fill_diagonal(L, -1.)
+        return L
 
     @property
     def Y0(self):
-        N = self.M
-        hsh = self.hsh
-        buses = self.masked_buses
-        lines = self.masked_lines
-        trafos = self.masked_trafos
-        Y0 = np.zeros((N, N), complex)
-        for bus in buses:
-            node = hsh[bus.bus_id]
-            if bus.gen_ground and np.isfinite(bus.xd):
-                Y0[node, node] -= 1j / bus.xd
-            if bus.load_ground == EARTH:
-                Y0[node, node] += 1 / bus.Z
-        for line in lines:
-            node1 = hsh[line.orig.bus_id]
-            node2 = hsh[line.dest.bus_id]
-            Y0[node1, node1] += 1 / line.Zpu + line.Ypu / 2
-            Y0[node2, node2] += 1 / line.Zpu + line.Ypu / 2
-            Y0[node1, node2] -= 1 / line.Zpu
-            Y0[node2, node1] -= 1 / line.Zpu
-        for trafo in trafos:
-            if trafo.primary == EARTH:
-                if trafo.secondary == EARTH:
-                    node1 = hsh[trafo.orig.bus_id]
-                    node2 = hsh[trafo.dest.bus_id]
-                    Y0[node1, node1] += 1 / trafo.Z0
-                    Y0[node2, node2] += 1 / trafo.Z0
-                    Y0[node1, node2] -= 1 / trafo.Z0
-                    Y0[node2, node1] -= 1 / trafo.Z0
-                elif trafo.secondary == DELTA:
-                    node = hsh[trafo.orig.bus_id]
-                    Y0[node, node] += 1 / trafo.Z0
-            elif trafo.primary == DELTA and trafo.secondary == EARTH:
-                node = hsh[trafo.dest.bus_id]
-                Y0[node, node] += 1 / trafo.Z0
-        return Y0
+        return self.cached('Y0', self.bus_revision, self.assemble_Y0)
+
+    def assemble_Y0(self):
+        buses = self.bus_table
+        energized = buses.energized
+        node = buses.index[energized]
+        xd = buses.xd[energized]
+        yg = np.where(buses.gen_ground[energized] & np.isfinite(xd), -1j / xd, 0.)
+        yl = (buses.pl - 1j * buses.ql)[energized] / buses.v[energized] ** 2
+        yl = np.where(buses.load_ground[energized] == EARTH, yl, 0.)
+        branches, mask, node1, node2 = self.energized_branches()
+        primary = branches.primary[mask]
+        secondary = branches.secondary[mask]
+        ys = 1 / branches.z0[mask]
+        ysh = branches.y[mask] / 2
+        series = (primary == -1) | (primary == EARTH) & (secondary == EARTH)
+        orig_shunt = (primary == EARTH) & (secondary == DELTA)
+        dest_shunt = (primary == DELTA) & (secondary == EARTH)
+        rows = np.concatenate([node, node1[series], node2[series], node1[series], node2[series],
+                               node1[orig_shunt], node2[dest_shunt]])
+        cols = np.concatenate([node, node1[series], node2[series], node2[series], node1[series],
+                               node1[orig_shunt], node2[dest_shunt]])
+        data = np.concatenate([yg + yl,
+                               (ys + ysh)[series], (ys + ysh)[series],
+                               -ys[series], -ys[series],
+                               ys[orig_shunt], ys[dest_shunt]])
+        return self.matrix(rows, cols, data)
 
     @property
     def Y1(self):
-        N = self.M
-        hsh = self.hsh
-        buses = self.masked_buses
-        lines = self.masked_lines
-        trafos = self.masked_trafos
-        Y1 = np.zeros((N, N), complex)
-        for bus in buses:
-            node = hsh[bus.bus_id]
-            Y1[node, node] += 1 / bus.Z
-            if np.isfinite(bus.xd):
-                Y1[node, node] -= 1j / bus.xd
-        for line in lines:
-            node1 = hsh[line.orig.bus_id]
-            node2 = hsh[line.dest.bus_id]
-            Y1[node1, node1] += 1 / line.Zpu + line.Ypu / 2
-            Y1[node2, node2] += 1 / line.Zpu + line.Ypu / 2
-            Y1[node1, node2] -= 1 / line.Zpu
-            Y1[node2, node1] -= 1 / line.Zpu
-        for trafo in trafos:
-            node1 = hsh[trafo.orig.bus_id]
-            node2 = hsh[trafo.dest.bus_id]
-            Y1[node1, node1] += 1 / trafo.Z1
-            Y1[node2, node2] += 1 / trafo.Z1
-            Y1[node1, node2] -= 1 / trafo.Z1
-            Y1[node2, node1] -= 1 / trafo.Z1
-        return Y1
-
-    def update(self, Nmax=100):
-        buses = self.masked_buses
-        lines = self.masked_lines
-        trafos = self.masked_trafos
-        hsh = self.hsh
-        V, S = self.update_flow(Nmax=Nmax)
-        for bus in buses:
-            bus.v = np.abs(V[hsh[bus.bus_id]])
-            bus.delta = np.angle(V[hsh[bus.bus_id]])
-            bus.pg = np.round(S[hsh[bus.bus_id], 0], 4) + bus.pl
-            bus.qg = np.round(S[hsh[bus.bus_id], 1], 4) + bus.ql
-        for line in lines:
-            node1 = hsh[line.orig.bus_id]
-            node2 = hsh[line.dest.bus_id]
-            line.v1 = V[node1]
-            line.v2 = V[node2]
-        for trafo in trafos:
-            node1 = hsh[trafo.orig.bus_id]
-            node2 = hsh[trafo.dest.bus_id]
-            trafo.v1 = V[node1]
-            trafo.v2 = V[node2]
-        If = self.update_short()
-        for bus in buses:
-            bus.iTPG = If[hsh[bus.bus_id], 0, 0]
-            bus.iSLG = If[hsh[bus.bus_id], 1, 0]
-            bus.iDLGb = If[hsh[bus.bus_id], 2, 1]
-            bus.iDLGc = If[hsh[bus.bus_id], 2, 2]
-            bus.iLL = If[hsh[bus.bus_id], 3, 1]
-
-    def update_flow(self, Nmax=100):
-        N = self.M
-        Y = self.Y
-        buses = self.masked_buses
-        V0 = np.zeros(N, complex)
-        S0 = np.zeros((N, 2))
-        for i in range(N):
-            if buses[i].bus_id == 0:
-                V0[i] = buses[i].v * np.exp(1j * buses[i].delta)
-                S0[i] = np.array([np.nan, np.nan])
-            elif buses[i].pg > 0:
-                V0[i] = buses[i].v
-                S0[i] = np.array([buses[i].pg - buses[i].pl, np.nan])
+        return self.cached('Y1', self.bus_revision, self.assemble_Y1)
+
+    def assemble_Y1(self):
+        buses = self.bus_table
+        energized = buses.energized
+        node = buses.index[energized]
+        xd = buses.xd[energized]
+        yg = np.where(np.isfinite(xd), -1j / xd, 0.)
+        yl = (buses.pl - 1j * buses.ql)[energized] / buses.v[energized] ** 2
+        Y1 = self.assemble_branches()
+        return Y1 + self.matrix(node, node, yg + yl)
+
+    @instrumented
+    def update(self, Nmax=100, method='newton', gs_sweeps=0, warm=None, workers=None,
+               callback=None, eps=1e-12):
+        with self.phase('topology', self.N):
+            buses = self.masked_buses
+            lines = self.masked_lines
+            trafos = self.masked_trafos
+            dead = set(self.dead_buses)
+            hsh = self.hsh
+        V, S = self.update_flow(Nmax=Nmax, method=method, gs_sweeps=gs_sweeps, warm=warm,
+                                workers=workers, callback=callback, eps=eps)
+        with self.phase('write_back', V.size):
+            # the islands that failed to solve keep their inputs, as the dead ones
+            unsolved = self.unsolved
+            buses = [bus for bus in buses if not unsolved[hsh[bus.bus_id]]]
+            lines = [line for line in lines if not unsolved[hsh[line.orig.bus_id]]]
+            trafos = [trafo for trafo in trafos if not unsolved[hsh[trafo.orig.bus_id]]]
+            for bus in buses:
+                settle(bus, 'v', np.abs(V[hsh[bus.bus_id]]))
+                settle(bus, 'delta', np.angle(V[hsh[bus.bus_id]]))
+                settle(bus, 'pg', np.round(S[hsh[bus.bus_id], 0], 4) + bus.pl)
+                settle(bus, 'qg', np.round(S[hsh[bus.bus_id], 1], 4) + bus.ql)
+            for line in lines:
+                node1 = hsh[line.orig.bus_id]
+                node2 = hsh[line.dest.bus_id]
+                line.v1 = V[node1]
+                line.v2 = V[node2]
+            for trafo in trafos:
+                node1 = hsh[trafo.orig.bus_id]
+                node2 = hsh[trafo.dest.bus_id]
+                trafo.v1 = V[node1]
+                trafo.v2 = V[node2]
+            for bus in dead:
+                # v and pg are setpoints, kept for when the island is energized again
+                bus.delta = bus.qg = 0.
+            for branch in self.lines + self.trafos:
+                if branch.orig in dead:
+                    branch.v1 = branch.v2 = 0.
+            self.attach_faults()
+
+    def attach_faults(self):
+        """Makes the fault currents of the buses come from short_circuit, so that
+        they are only computed if some bus asks for them (zero on dead islands)"""
+        for bus in self.buses:
+            bus.__dict__['_faults'] = self
+
+    @instrumented
+    def update_flow(self, Nmax=100, method='newton', gs_sweeps=0, warm=None, workers=None,
+                    callback=None, eps=1e-12):
+        """Solves the load flow of every energized island
+
+        Each island is solved on its own block of the network matrices, in
+        separate threads when there are several of them. Islands whose
+        solution fails keep the initial values, set ``status`` and are
+        flagged in the ``unsolved`` mask of the energized buses. The
+        SolverResult of each island, with the convergence reason and the
+        per-iteration telemetry, is kept in ``solver_results``, following
+        ``topology.islands``.
+
+        Parameters
+        ----------
+        Nmax: int, optional
+            Maximum number of iterations
+        method: {'newton', 'fdxb', 'fdbx', 'gauss_seidel'}, optional
+            Newton-Raphson, the XB/BX fast-decoupled load flow or Gauss-Seidel
+        gs_sweeps: int, optional
+            Number of Gauss-Seidel sweeps used to warm start the chosen method
+        warm: bool, optional
+            Whether to start from the last converged solution instead of a
+            flat start. By default it is used whenever there is one for the
+            current topology.
+        workers: int, optional
+            Number of threads solving the islands, defaults to one per
+            island up to the number of CPUs
+        callback: callable, optional
+            Called as ``callback(k, mismatch, step, V)`` after each
+            iteration of the solver of each island (from the worker threads
+            if there are several), stopping it by returning True
+        eps: float, optional
+            Tolerance on the largest voltage step. Large networks of short
+            lines may need a looser one, as rounding puts a floor under the
+            step.
+
+        Returns
+        -------
+        V: array, shape (M,)
+            Bus voltages
+        S: array, shape (M,2)
+            Injected active and reactive powers
+        """
+        if method not in ('newton', 'fdxb', 'fdbx', 'gauss_seidel'):
+            raise ValueError("unknown load flow method '{}'".format(method))
+        M = self.M
+        with self.phase('ybus', M):
+            Y = self.Y
+            B = ()
+            if method in ('fdxb', 'fdbx'):
+                B = self.decoupled_matrices(variant=method[2:].upper())
+        with self.phase('flow_inputs', M):
+            V0, S0 = self.flow_inputs()
+            solution = self._solution
+            if solution is not None and solution[0] != self.topology_revision:
+                solution = self._solution = None
+            if warm is None:
+                warm = solution is not None
+            if warm and solution is not None:
+                V0 = warm_start(V0, S0, solution[1])
+        islands = self.topology.islands
+        options = dict(method=method, Nmax=Nmax, gs_sweeps=gs_sweeps, callback=callback,
+                       eps=eps)
+        with self.phase('solve', M):
+            if len(islands) == 1:
+                results = [solve_island(Y, V0, S0, *B, **options)]
+            else:
+                blocks = [[A[nodes][:, nodes] for A in (Y,) + B] for nodes in islands]
+                if workers is None:
+                    workers = min(len(islands), os.cpu_count() or 1)
+                from concurrent.futures import ThreadPoolExecutor
+                with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+                    futures = [executor.submit(solve_island, A[0], V0[nodes], S0[nodes], *A[1:],
+                                               **options) for nodes, A in zip(islands, blocks)]
+                    results = [future.result() for future in futures]
+        self.solver_results = results
+        with self.phase('mismatch', M):
+            V = np.copy(V0)
+            for nodes, result in zip(islands, results):
+                V[nodes] = result.V
+            Scalc = V * np.conjugate(Y.dot(V))
+            S = np.zeros_like(S0)
+            S[:, 0] = Scalc.real
+            S[:, 1] = Scalc.imag
+            pv, pq, slack = bus_types(S0)
+            mismatch = np.zeros(V.size, bool)
+            mismatch[pv] = ~np.isclose(S[pv, 0], S0[pv, 0])
+            mismatch[pq] = ~np.isclose(S[pq], S0[pq]).all(axis=1)
+        unsolved = np.zeros(V.size, bool)
+        for nodes, result in zip(islands, results):
+            if result.reason == 'singular':
+                self.status = "singular jacobian!"
+            elif mismatch[nodes].any():
+                self.status = "power mismatch!"
             else:
-                V0[i] = 1.0
-                S0[i] = np.array([-buses[i].pl, -buses[i].ql])
-        niter, delta, V = newton_raphson(Y, V0, S0, eps=1e-12, Nmax=Nmax)
-        Scalc = V * np.conjugate(np.dot(Y, V))
-        S = np.zeros_like(S0)
-        S[:, 0] = Scalc.real
-        S[:, 1] = Scalc.imag
-        if not np.allclose(S[np.isfinite(S0)], S0[np.isfinite(S0)]):
-            self.status = "power mismatch!"
-            return V0, S0
+                continue
+            unsolved[nodes] = True
+            V[nodes] = V0[nodes]
+            S[nodes] = S0[nodes]
+        self.unsolved = unsolved
+        self._solution = None if unsolved.any() else (self.topology_revision, V)
         return V, S
 
-    def update_short(self):
-        buses = self.masked_buses
-        V = np.array([bus.v * np.exp(1j * bus.delta) for bus in buses])
-        Y0 = self.Y0
-        Y1 = self.Y1
-        If = short(Y1, Y0, V)
-        return If
+    def flow_inputs(self, pl=None, ql=None, pg=None):
+        """Initial voltages and specified powers of the energized buses
+
+        The slack bus keeps its voltage, buses with positive generation are
+        PV buses held at their voltage magnitude and the others are PQ buses
+        started at 1 pu.
+
+        Parameters
+        ----------
+        pl, ql, pg: array, shape (N,), optional
+            Loads and generation of each bus in ``buses`` order, defaulting
+            to the values stored in the buses
+
+        Returns
+        -------
+        V0: array, shape (M,)
+            Initial voltages
+        S0: array, shape (M,2)
+            Specified powers, NaN where unknown
+        """
+        return self.bus_table.flow_inputs(pl=pl, ql=ql, pg=pg)
+
+    @instrumented
+    def update_short(self, inversion=None):
+        """Fault currents of the buses connected to the slack bus
+
+        Parameters
+        ----------
+        inversion: {'full', 'selected'}, optional
+            How the Zbus diagonals are obtained (see `short`). Defaults to
+            'selected' for sparse systems and 'full' otherwise.
+        """
+        return self.short_circuit(inversion=inversion)
+
+    def short_circuit(self, buses=None, inversion=None):
+        """Fault currents from the current bus voltages
+
+        Results are kept per bus until a bus or branch changes, so asking
+        for a few buses only costs the Zbus diagonals of those buses.
+
+        Parameters
+        ----------
+        buses: list of Bus objects, optional
+            Energized buses whose fault currents are needed, defaulting to
+            all of them in matrix order
+        inversion: {'full', 'selected'}, optional
+            How the Zbus diagonals are obtained (see `short`). Defaults to
+            'selected' for sparse systems and 'full' otherwise.
+
+        Returns
+        -------
+        If: array, shape (K, 4, 3)
+            Phase currents of the TPG, SLG, DLG and LL faults at each bus
+        """
+        if inversion is None:
+            inversion = 'selected' if self.sparse else 'full'
+        if buses is None:
+            return self.cached('all_faults', self.bus_revision + (inversion,),
+                               lambda: self.short_circuit(self.masked_buses, inversion))
+        nodes = np.array([self.hsh[bus.bus_id] for bus in buses], int)
+        store = self.cached('faults', self.bus_revision + (inversion,), dict)
+        missing = [node for node in nodes if node not in store]
+        if missing:
+            table = self.bus_table
+            energized = table.energized
+            V = np.zeros(self.M, complex)
+            V[table.index[energized]] = table.V[energized]
+            with self.phase('sequence_ybus', V.size):
+                Y1, Y0 = self.Y1, self.Y0
+            with self.phase('short', len(missing)):
+                If = short(Y1, Y0, V, inversion=inversion, index=missing)
+            store.update(zip(missing, If))
+        return np.array([store[node] for node in nodes]).reshape(-1, 4, 3)
@@ -1,9 +1,10 @@
+import copy
 import pickle
 import shutil
 import sys
 
 import numpy as np
-from PyQt5.QtCore import pyqtSignal, Qt, QRegExp
+from PyQt5.QtCore import pyqtSignal, Qt, QRegExp, QObject, QRunnable, QThreadPool, QTimer
 from PyQt5.QtGui import QPen, QBrush, QDoubleValidator, QRegExpValidator, QIntValidator
 from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QWidget, QHBoxLayout, \
     QVBoxLayout, QLayout, QRadioButton, QGroupBox, QFormLayout, QLineEdit, QComboBox, \
@@ -24,6 +25,8 @@ DELTA_SYMBOL = "\u0394"
 PY_TO_SYMBOL = {STAR: STAR_SYMBOL, EARTH: EARTH_SYMBOL, DELTA: DELTA_SYMBOL}
 SYMBOL_TO_PY = {STAR_SYMBOL: STAR, EARTH_SYMBOL: EARTH, DELTA_SYMBOL: DELTA}
 
+SOLVE_DELAY = 150  # ms without edits before the system is solved again
+
 
 class Block:
     def __init__(self, start=False, end=True):
@@ -78,6 +81,32 @@ class HistoryData:
         self.current = [x, y]
 
 
+class SolveSignals(QObject):
+    finished = pyqtSignal(int, object, object)
+
+
+class SolveTask(QRunnable):
+    """Solves a copy of the system outside the Qt thread
+
+    Emits (generation, original system, solved copy) when done. Tasks whose
+    generation is already stale when they start are skipped.
+    """
+    def __init__(self, system, generation, current, Nmax):
+        super(SolveTask, self).__init__()
+        self.system = system
+        self.snapshot = copy.deepcopy(system)
+        self.generation = generation
+        self.current = current
+        self.Nmax = Nmax
+        self.signals = SolveSignals()
+
+    def run(self):
+        if self.generation != self.current():
+            return
+        self.snapshot.update(Nmax=self.Nmax)
+        self.signals.finished.emit(self.generation, self.system, self.snapshot)
+
+
 class ScrollView(QGraphicsView):
     def __init__(self, scene):
         super(ScrollView, self).__init__(scene)
@@ -270,6 +299,13 @@ class MainWidget(QWidget):
         self.line_types = {"Default": TransmissionLine(orig=None, dest=None)}
         self.curves = []
         self.max_niter = 20
+        self._generation = 0
+        self.solve_pool = QThreadPool(self)
+        self.solve_pool.setMaxThreadCount(1)
+        self.solve_timer = QTimer(self)
+        self.solve_timer.setSingleShot(True)
+        self.solve_timer.setInterval(SOLVE_DELAY)
+        self.solve_timer.timeout.connect(self.start_solve)
 
         self.editor = Editor(length=editor_square_length)
 
@@ -396,7 +432,7 @@ class MainWidget(QWidget):
         """Add a new type of line, if given parameters has passed in all the tests
         Called by: SubmitNewLineTypePushButton.pressed"""
         line = TransmissionLine(orig=None, dest=None)
-        line.__dict__.update(new_param)
+        line.param = new_param
         if name in self.line_types.keys():
             self.status_msg.emit("Duplicated name. Insert another valid name")
             return
@@ -422,7 +458,7 @@ class MainWidget(QWidget):
         if isinstance(curve.obj, TransmissionLine):
             line = curve.obj
             line.Z, line.Y = None, None
-            line.__dict__.update(line_model.param)
+            line.param = line_model.param
             line.vbase = vbase
             line.ell = ell
             self.status_msg.emit("Updated line with model")
@@ -431,7 +467,7 @@ class MainWidget(QWidget):
             self.remove_trafo(curve)
             new_line = TransmissionLine(orig=trafo.orig, dest=trafo.dest)
             new_line.Z, new_line.Y = None, None
-            new_line.__dict__.update(line_model.param)
+            new_line.param = line_model.param
             new_line.vbase = vbase
             new_line.ell = ell
             self.status_msg.emit("Trafo -> line, updated with model")
@@ -1140,10 +1176,45 @@ class MainWidget(QWidget):
             self._start_line = True
             if curr_curve.remove:
                 self.remove_curve(curr_curve)
+        self.request_solve()
+        self.update_layout()
+
+    def request_solve(self):
+        """Solves the system in the background once the edits settle down,
+        dropping the results of any solve still running"""
+        self._generation += 1
         if self.max_niter > 0:
-            self.system.update(Nmax=self.max_niter)
+            self.solve_timer.start()
+
+    def start_solve(self):
+        task = SolveTask(self.system, self._generation, lambda: self._generation,
+                         self.max_niter)
+        task.signals.finished.connect(self.finish_solve)
+        self.solve_pool.start(task)
+
+    def finish_solve(self, generation, system, solved):
+        """Copies the results of a background solve, unless the system has changed since"""
+        if generation != self._generation or system is not self.system:
+            return
+        for bus, solved_bus in zip(system.buses, solved.buses):
+            for name in ('v', 'delta', 'pg', 'qg'):
+                setattr(bus, name, getattr(solved_bus, name))
+        for branch, solved_branch in zip(system.lines + system.trafos,
+                                         solved.lines + solved.trafos):
+            branch.v1 = solved_branch.v1
+            branch.v2 = solved_branch.v2
+        system.status = solved.status
+        system._solution = solved._solution
+        system.attach_faults()
         self.update_layout()
 
+    def solve_now(self):
+        """Solves the system in the Qt thread, superseding any pending solve"""
+        self.solve_timer.stop()
+        self._generation += 1
+        if self.max_niter > 0:
+            self.system.update(Nmax=self.max_niter)
+
 
 class Window(QMainWindow):
     def __init__(self):
@@ -1234,6 +1305,7 @@ class Window(QMainWindow):
                                                   filter="All Files (*)",
                                                   options=options)
         if filename:
+            self.main_widget.solve_now()
             with open(filename, 'bw') as file:
                 self.store_data(file)
                 file.close()
@@ -1268,6 +1340,7 @@ class Window(QMainWindow):
                                                   filter=file_type,
                                                   options=options)
         if filename:
+            self.main_widget.solve_now()
             create_report(self.main_widget.system, self.main_widget.curves,
                           self.main_widget.editor.bus_grid, filename)
 
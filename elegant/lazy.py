@@ -0,0 +1,26 @@
+import importlib
+
+
+class LazyModule(object):
+    """Stand-in for a module that is only imported on first attribute access
+
+    Keeps networkx, scipy, matplotlib and pylatex out of ``import elegant``,
+    so that headless workers, which often start a fresh interpreter for a
+    short solve, do not pay for what they never use. Once imported, the
+    namespace of the module is copied into the stand-in, so that later
+    lookups cost the same as on the module itself.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            module = importlib.import_module(self._name)
+            self.__dict__.update(module.__dict__)
+            self._module = module
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return "<lazy module '{}'>".format(self._name)
@@ -1,65 +1,220 @@
+import time
+import warnings
+
 import numpy as np
 
-__all__ = ['short', 'gauss_seidel', 'newton_raphson']
+from .lazy import LazyModule
+
+sparse = LazyModule('scipy.sparse')
+linalg = LazyModule('scipy.linalg')
+sparse_linalg = LazyModule('scipy.sparse.linalg')
+
+__all__ = ['short', 'gauss_seidel', 'newton_raphson', 'fast_decoupled', 'dc_flow',
+           'SolverResult', 'SingularMatrixError']
+
+
+class SingularMatrixError(np.linalg.LinAlgError):
+    pass
+
+
+class SolverResult(object):
+    """Outcome of an iterative load flow solver
+
+    Unpacks as the ``(niter, delta, V)`` tuple the solvers used to return.
+
+    Attributes
+    ----------
+    niter: int
+        Number of iterations performed
+    delta: float
+        Largest voltage change in the last iteration
+    V: array, shape (N,)
+        Bus voltage approximations
+    reason: str
+        'converged', 'max_iter', 'singular', 'stopped' (by the callback) or
+        'empty'
+    mismatch: array, shape (niter,)
+        Largest power mismatch (pu) at the start of each iteration
+    step: array, shape (niter,)
+        Largest voltage change of each iteration
+    elapsed: array, shape (niter,)
+        Time (s) from the start of the solver to the end of each iteration
+    """
+    def __init__(self, niter, delta, V, reason, mismatch=(), step=(), elapsed=()):
+        self.niter = niter
+        self.delta = delta
+        self.V = V
+        self.reason = reason
+        self.mismatch = np.asarray(mismatch, float)
+        self.step = np.asarray(step, float)
+        self.elapsed = np.asarray(elapsed, float)
+
+    @property
+    def converged(self):
+        return self.reason == 'converged'
+
+    @property
+    def time(self):
+        """Time (s) from the start of the solver to the end of its last iteration"""
+        return float(self.elapsed[-1]) if self.elapsed.size > 0 else 0.
+
+    def __iter__(self):
+        return iter((self.niter, self.delta, self.V))
+
+    def __repr__(self):
+        return "SolverResult(niter={}, delta={:.3g}, reason='{}')".format(
+            self.niter, self.delta, self.reason)
+
+
+class Monitor(object):
+    """Per-iteration telemetry of a solver
+
+    Records the mismatch, step and elapsed time of each iteration and hands
+    them to ``callback(k, mismatch, step, V)``, which stops the solver by
+    returning True.
+    """
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.mismatch = []
+        self.step = []
+        self.elapsed = []
+        self.start = time.perf_counter()
+
+    def record(self, mismatch, step, V):
+        """Returns whether the callback asks the solver to stop"""
+        self.mismatch.append(mismatch)
+        self.step.append(step)
+        self.elapsed.append(time.perf_counter() - self.start)
+        return self.callback is not None and bool(self.callback(len(self.step), mismatch, step, V))
+
+    def result(self, niter, delta, V, reason):
+        return SolverResult(niter, delta, V, reason, self.mismatch, self.step, self.elapsed)
+
 
+def largest(x):
+    """Infinity norm, zero for an empty array"""
+    return float(np.max(np.abs(x))) if x.size > 0 else 0.
 
-def short(Y1, Y0, V):
+
+def short(Y1, Y0, V, inversion='full', index=None):
     """Calculates three-phase short circuit current levels for each bus
 
     Parameters
     ----------
-    Y1: array, shape (N,N)
+    Y1: array or sparse matrix, shape (N,N)
         Positive-sequence bus admittance matrix
-    Y0: array, shape (N,N)
+    Y0: array or sparse matrix, shape (N,N)
         Zero-sequence bus admittance matrix
     V: array, shape (N,)
         Pre-fault voltage levels for each bus
+    inversion: {'full', 'selected'}, optional
+        Whether to invert the sequence matrices or to compute only the
+        diagonal of each Zbus from a single LU factorization
+    index: array of int, optional
+        Faulted buses (default: all)
 
     Returns
     -------
-    I: array, shape (N, 4, 3)
-        Three-phase current levels for each of the N buses for each of the following fault types:
+    I: array, shape (K, 4, 3)
+        Three-phase current levels for each of the K faulted buses for each of the
+        following fault types:
 
         * Three-phase to ground (TPG);
         * Single-line to ground (SLG);
         * Double-line to ground (DLG);
         * Line-to-line (LL)
     """
-    N = len(V)
-    if N > 0 and np.linalg.cond(Y1) < 1 / np.finfo(Y1.dtype).eps and \
-            np.linalg.cond(Y0) < 1 / np.finfo(Y0.dtype).eps:
-        Z1 = np.diag(np.linalg.inv(Y1))
-        Z0 = np.diag(np.linalg.inv(Y0))
-    else:
+    if inversion not in ('full', 'selected'):
+        raise ValueError("inversion must be 'full' or 'selected'")
+    if index is None:
+        index = np.arange(len(V))
+    index = np.asarray(index, int)
+    N = index.size
+    if N < 1:
         return np.zeros((N, 4, 3))
+    block = 256 if inversion == 'selected' else len(V)
+    try:
+        Z1 = zbus_diagonal(Y1, index=index, block=block)
+        Z0 = zbus_diagonal(Y0, index=index, block=block)
+    except SingularMatrixError:
+        return np.zeros((N, 4, 3))
+    V = np.asarray(V)[index]
     alpha = np.exp(2j * np.pi / 3)
     A = np.array([[1, 1, 1], [1, alpha ** 2, alpha], [1, alpha, alpha ** 2]])
-    I = []
-    for i in range(N):
-        # TPG
-        if1 = np.dot(A, np.array([0., V[i] / Z1[i], 0.]))
-        # SLG
-        if2a = 3 * V[i] / (2 * Z1[i] + Z0[i])
-        if2 = np.array([if2a, 0., 0.])
-        # DLG
-        if3a = V[i] / (Z1[i] + Z1[i] * Z0[i] / (Z1[i] + Z0[i]))
-        if3 = np.array([-if3a * Z1[i] / (Z1[i] + Z0[i]), if3a, -if3a * Z0[i] / (Z1[i] + Z0[i])])
-        if3 = np.dot(A, if3)
-        # LL
-        if4 = V[i] / (2 * Z1[i])
-        if4 = np.array([0., if4, -if4])
-        if4 = np.dot(A, if4)
-        I.append([if1, if2, if3, if4])
-    return np.array(I)
-
-
-def gauss_seidel(Y, V0, S, eps=None, Niter=1, Nmax=1000):
+    # Sequence currents (0, +, -) for each bus and fault type
+    Iseq = np.zeros((N, 4, 3), complex)
+    # TPG
+    Iseq[:, 0, 1] = V / Z1
+    # SLG
+    Iseq[:, 1, :] = (V / (2 * Z1 + Z0))[:, np.newaxis]
+    # DLG
+    if3a = V / (Z1 + Z1 * Z0 / (Z1 + Z0))
+    Iseq[:, 2, 0] = -if3a * Z1 / (Z1 + Z0)
+    Iseq[:, 2, 1] = if3a
+    Iseq[:, 2, 2] = -if3a * Z0 / (Z1 + Z0)
+    # LL
+    Iseq[:, 3, 1] = V / (2 * Z1)
+    Iseq[:, 3, 2] = -V / (2 * Z1)
+    return np.einsum('ij,nkj->nki', A, Iseq)
+
+
+def bus_types(S):
+    """Classifies the buses by which of their powers are specified
+
+    Parameters
+    ----------
+    S: array, shape (N,2)
+        Specified apparent power, with NaN marking the unknown quantities
+
+    Returns
+    -------
+    pv, pq, slack: arrays of int
+        Indices of the PV (known P), PQ (known P and Q) and slack buses
+    """
+    known_p = np.isfinite(S[:, 0])
+    known_q = np.isfinite(S[:, 1])
+    pv = np.flatnonzero(known_p & ~known_q)
+    pq = np.flatnonzero(known_p & known_q)
+    slack = np.flatnonzero(~known_p)
+    return pv, pq, slack
+
+
+def warm_start(V0, S, V):
+    """Initial guess taken from a previous solution
+
+    Parameters
+    ----------
+    V0: array, shape (N,)
+        Flat-start voltages, holding the slack voltage and PV magnitudes
+    S: array, shape (N,2)
+        Specified apparent power
+    V: array, shape (N,)
+        Previous solution of the same network
+
+    Returns
+    -------
+    V0: array, shape (N,)
+        Previous angles and PQ magnitudes, with the slack voltage and the
+        PV magnitudes of `V0`
+    """
+    pv, pq, slack = bus_types(S)
+    Vm = np.abs(V0)
+    Vm[pq] = np.abs(V[pq])
+    Vwarm = Vm * np.exp(1j * np.angle(V))
+    Vwarm[slack] = V0[slack]
+    return Vwarm
+
+
+def gauss_seidel(Y, V0, S, eps=None, Niter=1, Nmax=1000, omega=1., jacobi=False,
+                 callback=None):
     """Gauss-Seidel Method
 
+    A few sweeps make a cheap warm start for `newton_raphson`.
+
     Parameters
     ----------
-    Y: array, shape (N,N)
-        Ybus matrix
+    Y: array or sparse matrix, shape (N,N)
+        Ybus matrix. Sparse matrices are swept row by row in CSR form.
     V0: array, shape (N,)
         Complex initial guess
     S: array, shape (N,2)
@@ -68,15 +223,42 @@ def gauss_seidel(Y, V0, S, eps=None, Niter=1, Nmax=1000):
         Tolerance
     Niter: int, optional
         Minimum number of iterations (default=1)
+    Nmax: int, optional
+        Maximum number of iterations (default=1000)
+    omega: float, optional
+        Over-relaxation factor (default=1, plain Gauss-Seidel)
+    jacobi: bool, optional
+        Whether to update every bus at once from the previous sweep
+        (vectorized Jacobi iteration) instead of one bus at a time
+    callback: callable, optional
+        Called as ``callback(k, mismatch, step, V)`` after each iteration,
+        stops the solver by returning True
 
     Returns
     -------
-    V: array, shape (N,)
-        Bus voltage approximations
+    result: SolverResult
     """
+    monitor = Monitor(callback)
     N = V0.size
     if N < 1:
-        return 0, np.inf, V0
+        return monitor.result(0, np.inf, V0, 'empty')
+    pv, pq, slack = bus_types(S)
+    pvpq = np.sort(np.concatenate([pv, pq]))
+    is_pv = np.isnan(S[:, 1])
+    P = S[:, 0]
+    Q = np.copy(S[:, 1])
+    if sparse.issparse(Y):
+        Y = sparse.csr_matrix(Y)
+        Ydiag = Y.diagonal()
+
+        def row_dot(i):
+            start, end = Y.indptr[i], Y.indptr[i + 1]
+            return np.dot(Y.data[start:end], V[Y.indices[start:end]])
+    else:
+        Ydiag = np.diag(Y)
+
+        def row_dot(i):
+            return np.dot(Y[i], V)
     Vold = np.copy(V0)
     V = np.copy(V0)
     delta = np.inf
@@ -84,24 +266,34 @@ def gauss_seidel(Y, V0, S, eps=None, Niter=1, Nmax=1000):
         eps = np.inf
     count = 0
     while (delta > eps or count < Niter) and count < Nmax:
-        for i in range(N):
-            I = np.dot(Y[i], V)
-            P, Q = S[i]
-            if np.isnan(P):
-                continue
-            if np.isnan(Q):
-                Q = -np.imag(np.conjugate(V[i]) * I)
-                V[i] = ((P - 1j * Q) / np.conjugate(V[i]) - (I - Y[i, i] * V[i])) / Y[i, i]
-                V[i] = V[i] * np.abs(Vold[i]) / np.abs(V[i])
-            else:
-                V[i] = ((P - 1j * Q) / np.conjugate(V[i]) - (I - Y[i, i] * V[i])) / Y[i, i]
+        Ifull = Y.dot(V)
+        Scalc = V * np.conjugate(Ifull)
+        mismatch = max(largest(P[pvpq] - Scalc[pvpq].real), largest(S[pq, 1] - Scalc[pq].imag))
+        if jacobi:
+            I = Ifull[pvpq]
+            Vk = V[pvpq]
+            Qk = np.where(is_pv[pvpq], -np.imag(np.conjugate(Vk) * I), Q[pvpq])
+            Vgs = ((P[pvpq] - 1j * Qk) / np.conjugate(Vk) - (I - Ydiag[pvpq] * Vk)) / Ydiag[pvpq]
+            V[pvpq] = Vk + omega * (Vgs - Vk)
+            V[pv] = V[pv] * np.abs(Vold[pv]) / np.abs(V[pv])
+        else:
+            for i in pvpq:
+                I = row_dot(i)
+                if is_pv[i]:
+                    Q[i] = -np.imag(np.conjugate(V[i]) * I)
+                Vgs = ((P[i] - 1j * Q[i]) / np.conjugate(V[i]) - (I - Ydiag[i] * V[i])) / Ydiag[i]
+                V[i] = V[i] + omega * (Vgs - V[i])
+                if is_pv[i]:
+                    V[i] = V[i] * np.abs(Vold[i]) / np.abs(V[i])
         delta = max(np.abs(V - Vold))
         Vold = np.copy(V)
         count += 1
-    return count, delta, V
+        if monitor.record(mismatch, delta, V):
+            return monitor.result(count, delta, V, 'stopped')
+    return monitor.result(count, delta, V, 'converged' if delta <= eps else 'max_iter')
 
 
-def newton_raphson(Y, V0, S, eps=None, Niter=1, Nmax=1000):
+def newton_raphson(Y, V0, S, eps=None, Niter=1, Nmax=1000, callback=None):
     """
     Parameters
     ----------
@@ -110,14 +302,20 @@ def newton_raphson(Y, V0, S, eps=None, Niter=1, Nmax=1000):
     S: array with specified powers in each bar (N, 2)
     eps: defined tolerance, default = None
     Niter: max number of iterations, default = 1
+    callback: called as callback(k, mismatch, step, V) after each iteration,
+        stops the solver by returning True, default = None
 
     Returns
     -------
     V0: updated array with estimates to the node tensions (1, N)
     """
+    monitor = Monitor(callback)
     N = V0.size
     if N < 1:
-        return 0, np.inf, V0
+        return monitor.result(0, np.inf, V0, 'empty')
+    pv, pq, slack = bus_types(S)
+    pvpq = np.sort(np.concatenate([pv, pq]))
+    unknowns = np.concatenate([pvpq, pq + N])
     V = np.copy(V0)
     Vold = np.copy(V0)
     delta = np.inf
@@ -125,21 +323,293 @@ def newton_raphson(Y, V0, S, eps=None, Niter=1, Nmax=1000):
         eps = np.inf
     count = 0
     while (delta > eps or count < Niter) and count < Nmax:
-        deltaPQ = np.zeros((2 * N, 1))
-        for i in range(N):
-            P, Q = S[i]
-            I = np.dot(Y[i], V)
-            if np.isfinite(P):
-                Pcalc = np.real(V[i] * np.conjugate(I))
-                deltaPQ[i] = P - Pcalc
-                if np.isfinite(Q):
-                    Qcalc = np.imag(V[i] * np.conjugate(I))
-                    deltaPQ[i + N] = Q - Qcalc
-        V = update_V(deltaPQ, N, V, Y)
+        Scalc = V * np.conjugate(Y.dot(V))
+        deltaPQ = np.concatenate([S[pvpq, 0] - Scalc[pvpq].real,
+                                  S[pq, 1] - Scalc[pq].imag])
+        try:
+            V = update_V(deltaPQ, unknowns, V, Y)
+        except SingularMatrixError:
+            return monitor.result(count, delta, V, 'singular')
+        delta = max(np.abs(V - Vold))
+        Vold = np.copy(V)
+        count += 1
+        if monitor.record(largest(deltaPQ), delta, V):
+            return monitor.result(count, delta, V, 'stopped')
+    return monitor.result(count, delta, V, 'converged' if delta <= eps else 'max_iter')
+
+
+def fast_decoupled(Y, V0, S, Bp, Bpp, eps=None, Niter=1, Nmax=1000, factors=None,
+                   callback=None):
+    """Fast-decoupled load flow
+
+    Parameters
+    ----------
+    Y: array or sparse matrix, shape (N,N)
+        Ybus matrix
+    V0: array, shape (N,)
+        Complex initial guess
+    S: array, shape (N,2)
+        Specified apparent power
+    Bp, Bpp: array or sparse matrix, shape (N,N)
+        Constant B' and B'' susceptance matrices (XB or BX variant)
+    eps: float, optional
+        Tolerance
+    Niter: int, optional
+        Minimum number of iterations (default=1)
+    Nmax: int, optional
+        Maximum number of iterations (default=1000)
+    factors: dict, optional
+        Keeps the factorizations of B' and B'' between calls, keyed by the
+        bus types, so that repeated solves on the same network reuse them
+    callback: callable, optional
+        Called as ``callback(k, mismatch, step, V)`` after each iteration,
+        stops the solver by returning True
+
+    Returns
+    -------
+    result: SolverResult
+        The mismatch of each iteration is the largest of its P and Q
+        half-iterations
+    """
+    monitor = Monitor(callback)
+    N = V0.size
+    if N < 1:
+        return monitor.result(0, np.inf, V0, 'empty')
+    pv, pq, slack = bus_types(S)
+    pvpq = np.sort(np.concatenate([pv, pq]))
+    key = (pvpq.tobytes(), pq.tobytes())
+    if factors is not None and key in factors:
+        solve_p, solve_q = factors[key]
+    else:
+        try:
+            solve_p = factorize(Bp[pvpq][:, pvpq]) if pvpq.size > 0 else None
+            solve_q = factorize(Bpp[pq][:, pq]) if pq.size > 0 else None
+        except SingularMatrixError:
+            return monitor.result(0, np.inf, V0, 'singular')
+        if factors is not None:
+            factors[key] = solve_p, solve_q
+    Va = np.angle(V0)
+    Vm = np.abs(V0)
+    V = np.copy(V0)
+    Vold = np.copy(V0)
+    delta = np.inf
+    if eps is None:
+        eps = np.inf
+    count = 0
+    while (delta > eps or count < Niter) and count < Nmax:
+        mismatch = 0.
+        if solve_p is not None:
+            Scalc = V * np.conjugate(Y.dot(V))
+            dP = S[pvpq, 0] - Scalc[pvpq].real
+            Va[pvpq] += solve_p(dP / Vm[pvpq])
+            V = Vm * np.exp(1j * Va)
+            mismatch = largest(dP)
+        if solve_q is not None:
+            Scalc = V * np.conjugate(Y.dot(V))
+            dQ = S[pq, 1] - Scalc[pq].imag
+            Vm[pq] += solve_q(dQ / Vm[pq])
+            V = Vm * np.exp(1j * Va)
+            mismatch = max(mismatch, largest(dQ))
+        delta = max(np.abs(V - Vold))
+        Vold = np.copy(V)
+        count += 1
+        if monitor.record(mismatch, delta, V):
+            return monitor.result(count, delta, V, 'stopped')
+    return monitor.result(count, delta, V, 'converged' if delta <= eps else 'max_iter')
+
+
+def dc_flow(B, P, slack=0):
+    """DC load flow
+
+    Parameters
+    ----------
+    B: array or sparse matrix, shape (N,N)
+        Bus susceptance matrix built from the branch reactances
+    P: array, shape (N,)
+        Active power injections
+    slack: int or array of int, optional
+        Index of the reference bus of each island, whose angle is zero
+
+    Returns
+    -------
+    theta: array, shape (N,)
+        Bus voltage angles (rad)
+
+    Raises
+    ------
+    SingularMatrixError
+        If the reduced susceptance matrix is singular
+    """
+    N = P.size
+    theta = np.zeros(N)
+    others = np.delete(np.arange(N), slack)
+    if others.size > 0:
+        theta[others] = factorize(B[others][:, others])(P[others])
+    return theta
+
+
+def chord_newton(Y, V0, S, solve, eps=None, Niter=1, Nmax=1000, callback=None):
+    """Newton-Raphson load flow with a fixed, already factorized Jacobian
+
+    Parameters
+    ----------
+    Y: array or sparse matrix, shape (N,N)
+        Ybus matrix used in the power mismatches
+    V0: array, shape (N,)
+        Complex initial guess
+    S: array, shape (N,2)
+        Specified apparent power
+    solve: callable
+        Solves the reduced Jacobian system, as returned by `factorize` or
+        `woodbury`, for the unknowns ordered as in `newton_raphson`
+    eps: float, optional
+        Tolerance
+    Niter: int, optional
+        Minimum number of iterations (default=1)
+    Nmax: int, optional
+        Maximum number of iterations (default=1000)
+    callback: callable, optional
+        Called as ``callback(k, mismatch, step, V)`` after each iteration,
+        stops the solver by returning True
+
+    Returns
+    -------
+    result: SolverResult
+    """
+    monitor = Monitor(callback)
+    N = V0.size
+    if N < 1:
+        return monitor.result(0, np.inf, V0, 'empty')
+    pv, pq, slack = bus_types(S)
+    pvpq = np.sort(np.concatenate([pv, pq]))
+    unknowns = np.concatenate([pvpq, pq + N])
+    x = np.concatenate([np.angle(V0), np.abs(V0)])
+    V = np.copy(V0)
+    Vold = np.copy(V0)
+    delta = np.inf
+    if eps is None:
+        eps = np.inf
+    count = 0
+    while (delta > eps or count < Niter) and count < Nmax and unknowns.size > 0:
+        Scalc = V * np.conjugate(Y.dot(V))
+        deltaPQ = np.concatenate([S[pvpq, 0] - Scalc[pvpq].real,
+                                  S[pq, 1] - Scalc[pq].imag])
+        x[unknowns] += solve(deltaPQ)
+        V = x[N:] * np.exp(1j * x[:N])
         delta = max(np.abs(V - Vold))
         Vold = np.copy(V)
         count += 1
-    return count, delta, V
+        if monitor.record(largest(deltaPQ), delta, V):
+            return monitor.result(count, delta, V, 'stopped')
+    if unknowns.size == 0:
+        delta = 0.
+    return monitor.result(count, delta, V, 'converged' if delta <= eps else 'max_iter')
+
+
+def factorize(A):
+    """Factorizes a square matrix once so that it can be reused
+
+    Parameters
+    ----------
+    A: array or sparse matrix, shape (N,N)
+
+    Returns
+    -------
+    solve: callable
+        Solves A x = b for a right-hand side b of shape (N,) or (N, K)
+
+    Raises
+    ------
+    SingularMatrixError
+        If a pivot of the factorization vanishes relative to the largest one
+    """
+    if sparse.issparse(A):
+        try:
+            lu = sparse_linalg.splu(A.tocsc())
+        except RuntimeError:
+            raise SingularMatrixError("matrix is exactly singular")
+        pivots = np.abs(lu.U.diagonal())
+        solve = lu.solve
+    else:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', linalg.LinAlgWarning)
+            lu = linalg.lu_factor(A)
+        pivots = np.abs(np.diag(lu[0]))
+        solve = lambda b: linalg.lu_solve(lu, b)  # noqa: E731
+    if pivots.size > 0 and not pivots.min() > pivots.max() * pivots.size * np.finfo(float).eps:
+        raise SingularMatrixError("matrix is singular to working precision")
+    return solve
+
+
+def woodbury(solve, rows, C):
+    """Solver of A + E C from the solver of A (Sherman-Morrison-Woodbury)
+
+    Parameters
+    ----------
+    solve: callable
+        Solves A x = b, as returned by `factorize`
+    rows: array, shape (K,)
+        Rows of A changed by the update, E being their (N, K) selector
+    C: array, shape (K, N)
+        Change of those rows
+
+    Returns
+    -------
+    solve: callable
+        Solves (A + E C) x = b
+
+    Raises
+    ------
+    SingularMatrixError
+        If the updated matrix is singular
+    """
+    K = len(rows)
+    if K == 0:
+        return solve
+    E = np.zeros((C.shape[1], K))
+    E[rows, np.arange(K)] = 1.
+    Z = solve(E)
+    solve_small = factorize(np.eye(K) + C.dot(Z))
+
+    def solve_updated(b):
+        x = solve(b)
+        return x - Z.dot(solve_small(C.dot(x)))
+
+    return solve_updated
+
+
+def zbus_diagonal(Y, index=None, block=256):
+    """Diagonal of the bus impedance matrix without inverting Y
+
+    Y is factorized once and only the requested columns of its inverse are
+    solved for, `block` columns at a time, so that memory stays O(N * block).
+
+    Parameters
+    ----------
+    Y: array or sparse matrix, shape (N,N)
+        Bus admittance matrix
+    index: array of int, optional
+        Buses whose driving-point impedances are needed (default: all)
+    block: int, optional
+        Number of columns solved at once
+
+    Returns
+    -------
+    Z: array, shape (len(index),)
+        Driving-point impedances Zbus[k, k] for k in index
+    """
+    N = Y.shape[0]
+    if index is None:
+        index = np.arange(N)
+    index = np.asarray(index, int)
+    solve = factorize(Y)
+    Z = np.empty(index.size, complex)
+    for k in range(0, index.size, block):
+        cols = index[k:k + block]
+        rhs = np.zeros((N, cols.size), complex)
+        rhs[cols, np.arange(cols.size)] = 1.
+        Z[k:k + block] = solve(rhs)[cols, np.arange(cols.size)]
+    return Z
 
 
 def Gij(i, j, Y):
@@ -230,48 +700,70 @@ def jacobian(N, V0, Y):
     return J
 
 
-def DeltaVdelta(deltaPQ, N, V0, Y):
+def polar_jacobian(V, Y):
+    """Vectorized power flow Jacobian in polar coordinates
+
+    Parameters
+    ----------
+    V: array, shape (N,)
+        Complex bus voltages
+    Y: array or sparse matrix, shape (N,N)
+        Ybus matrix
+
+    Returns
+    -------
+    J: array or CSR matrix, shape (2N, 2N)
+        Derivatives of the bus power injections with respect to the voltage
+        angles and magnitudes, arranged as [[dP/da, dP/d|V|], [dQ/da, dQ/d|V|]].
+        Unlike `jacobian`, the magnitude columns are not scaled by |V|.
+    """
+    I = Y.dot(V)
+    Vnorm = V / np.abs(V)
+    if sparse.issparse(Y):
+        diagV = sparse.diags(V)
+        diagI = sparse.diags(I)
+        diagVnorm = sparse.diags(Vnorm)
+        dS_da = 1j * diagV @ (diagI - Y @ diagV).conjugate()
+        dS_dm = diagV @ (Y @ diagVnorm).conjugate() + diagI.conjugate() @ diagVnorm
+        return sparse.bmat([[dS_da.real, dS_dm.real],
+                            [dS_da.imag, dS_dm.imag]], format='csr')
+    dS_da = 1j * V[:, np.newaxis] * np.conjugate(np.diag(I) - Y * V[np.newaxis, :])
+    dS_dm = V[:, np.newaxis] * np.conjugate(Y * Vnorm[np.newaxis, :]) \
+        + np.diag(np.conjugate(I) * Vnorm)
+    return np.block([[dS_da.real, dS_dm.real],
+                     [dS_da.imag, dS_dm.imag]])
+
+
+def DeltaVdelta(deltaPQ, unknowns, V0, Y):
     """
     Parameters
     ----------
-    deltaPQ: mismatches arrays (1, N)
-    N: size of V0
+    deltaPQ: mismatches of the specified powers, ordered as `unknowns`
+    unknowns: positions of the unknown angles and magnitudes in the full
+        (2N,) state vector [angles, magnitudes]
     V0: array with initial estimates (1, N)
     Y: admittance matrix
 
     Returns
     -------
-    jacobianDisregard: array with positions to be removed from J
     deltaVdelta: array with the increasing values to update V0
+
+    Raises
+    ------
+    SingularMatrixError
+        If the reduced Jacobian is singular
     """
-    n = np.size(deltaPQ)
-    deltaPQAdj = np.empty((0, 0))
-    jacobianDisregard = np.empty((0, 0))
-    jAdj = jacobian(N, V0, Y)
-    for i in range(n):
-        if deltaPQ[i] != 0.:
-            deltaPQAdj = np.append(deltaPQAdj, deltaPQ[i])
-        else:
-            jacobianDisregard = np.append(jacobianDisregard, i)
-    jacobianDisregard = jacobianDisregard[-1::-1]
-    for lincol in jacobianDisregard:
-        jAdj = np.delete(jAdj, int(lincol), 0)
-        jAdj = np.delete(jAdj, int(lincol), 1)
-    jacobianDisregard = set(jacobianDisregard)
-    if np.size(jAdj) > 0 and np.linalg.cond(jAdj) < 1 / np.finfo(jAdj.dtype).eps:
-        deltaVdelta = np.linalg.solve(jAdj, deltaPQAdj)
-    else:
-        print('### SINGULAR JACOBIAN! ###')
-        return None, None
-    return deltaVdelta, jacobianDisregard
+    jAdj = polar_jacobian(V0, Y)[unknowns][:, unknowns]
+    return factorize(jAdj)(deltaPQ)
 
 
-def update_V(deltaPQ, N, V0, Y):
+def update_V(deltaPQ, unknowns, V0, Y):
     """
     Parameters
     ----------
-    deltaPQ:
-    N: size of V0
+    deltaPQ: mismatches of the specified powers, ordered as `unknowns`
+    unknowns: positions of the unknown angles and magnitudes in the full
+        (2N,) state vector [angles, magnitudes]
     V0: array with initial estimates (1, N)
     Y: admittance matrix
 
@@ -279,23 +771,10 @@ def update_V(deltaPQ, N, V0, Y):
     -------
     V0: updated array with new estimates to the node voltages
     """
-    deltaVdelta, RemoveFromJAdj = DeltaVdelta(deltaPQ, N, V0, Y)
-    if deltaVdelta is None:
+    N = V0.size
+    if unknowns.size == 0:
         return V0
-    vAdj = np.empty((0, 0))
-    for v in V0:  # First the angles of voltages
-        vAdj = np.append(vAdj, np.angle(v))
-    for v in V0:  # Lastly, the absolute values of voltages
-        vAdj = np.append(vAdj, np.abs(v))
-    vAdj_counter = 0
-    for i in range(np.size(vAdj)):
-        if i in RemoveFromJAdj:
-            pass
-        else:
-            vAdj[i] += deltaVdelta[vAdj_counter]
-            vAdj_counter += 1
-    vAdj_counter = int(np.size(vAdj) / 2)
-    for i in range(N):
-        V0[i] = vAdj[vAdj_counter] * np.exp(1j * vAdj[vAdj_counter - N])
-        vAdj_counter += 1
-    return V0
+    deltaVdelta = DeltaVdelta(deltaPQ, unknowns, V0, Y)
+    vAdj = np.concatenate([np.angle(V0), np.abs(V0)])
+    vAdj[unknowns] += deltaVdelta
+    return vAdj[N:] * np.exp(1j * vAdj[:N])
@@ -2,12 +2,12 @@ import datetime
 import os
 import shutil
 
-import matplotlib.pyplot as plt
 import numpy as np
-from pylatex import Document, Section, Command, NoEscape, Figure, \
-    Subsection, MultiColumn, MultiRow, UnsafeCommand, LongTable, NewPage
 
 from .core import TransmissionLine, Bus
+from .lazy import LazyModule
+
+plt = LazyModule('matplotlib.pyplot')
 
 DIST = 0.30
 MIN_FSIZE = 4
@@ -147,10 +147,10 @@ def direction_based_correction(extremities):
     return [[corr_ox, corr_oy], [corr_dx, corr_dy], [corr_sslope, corr_eslope]]
 
 
-def annotate_flow(ax, gcurves, curves, fontsize):
+def annotate_flow(ax, gcurves, curves, fontsize, flows):
     texts = []
     for gcurve, curve in zip(gcurves, curves):
-        obj = curve.obj
+        k = flows.row(curve.obj)
         real_data = collect_display_line_data(ax, gcurve)
         abstract_data = collect_abstract_line_data(gcurve)
         dys_sslope, dys_eslope = get_line_slopes(real_data)
@@ -167,13 +167,13 @@ def annotate_flow(ax, gcurves, curves, fontsize):
                          'fontsize': fontsize,
                          'verticalalignment': 'bottom'}
         hmask = {1: 'left', -1: 'right'}
-        ltxt = ax.annotate("{:.1f}".format(obj.S1 * 100),
+        ltxt = ax.annotate("{:.1f}".format(flows.S1[k] * 100),
                            xy=(sx, sy),
                            horizontalalignment=hmask[corr[0][0]],
                            rotation=dys_sslope * corr[2][0],
                            color='b',
                            **common_config)
-        xtxt = ax.annotate("{:.1f}".format(-obj.S2 * 100),
+        xtxt = ax.annotate("{:.1f}".format(-flows.S2[k] * 100),
                            xy=(ex, ey),
                            horizontalalignment=hmask[corr[1][0]],
                            rotation=dys_eslope * corr[2][1],
@@ -202,12 +202,14 @@ def overlapping(texts):
     return overlapping_with_texts(texts)
 
 
-def make_system_schematic(curves, grid, initial_fontsize, save=False,
+def make_system_schematic(system, curves, grid, initial_fontsize, save=False,
                           filepath=None, show=False, ext='pdf'):
     """Plots the system schematic
 
     Parameters
     ----------
+    system: PowerSystem object
+        Solved system whose branch flows are annotated
     curves: list of LineSegment objects
         Used to draw the system schematic
     grid: array-like
@@ -225,13 +227,14 @@ def make_system_schematic(curves, grid, initial_fontsize, save=False,
         File extension to save figure if save is True, defaults to 'pdf'.
     """
     fs = initial_fontsize
+    flows = system.branch_flows()
     ax = plt.gca()
     gcurves = draw_rep_scheme(grid, curves)
-    texts = annotate_flow(ax, gcurves, curves, fs)
+    texts = annotate_flow(ax, gcurves, curves, fs, flows)
     while overlapping(texts) and fs > MIN_FSIZE:
         clean_from_scene(texts)
         fs -= 0.25
-        texts = annotate_flow(ax, gcurves, curves, fs)
+        texts = annotate_flow(ax, gcurves, curves, fs, flows)
     if save:
         img = os.path.join(filepath) + '_i.' + ext
         plt.savefig(img, bbox_inches='tight')
@@ -241,6 +244,7 @@ def make_system_schematic(curves, grid, initial_fontsize, save=False,
 
 def safe_repr(val, is_tex=True):
     if is_tex:
+        from pylatex import NoEscape
         if np.abs(val) < 1e6:
             if isinstance(val, complex):
                 return NoEscape(f'{np.abs(val):.02f}'
@@ -262,6 +266,7 @@ def safe_repr(val, is_tex=True):
 def get_scheme(tr, is_tex=True):
     code = {0: '$\\why{}$', 1: '$\\wye{}$', 2: '$\\Delta$'}
     if is_tex:
+        from pylatex import NoEscape
         code = {0: '$\\why{}$', 1: '$\\wye{}$', 2: '$\\Delta$'}
         return NoEscape('{} {}'.format(code[tr.primary], code[tr.secondary]))
     else:
@@ -280,6 +285,7 @@ def text_report(system, curves, grid, filename):
     lines = system.lines
     trafos = system.trafos
     buses = system.buses
+    flows = system.branch_flows()
     filepath = filename.strip('.dat')
     f = open(f'{filepath}.dat', 'w', encoding='utf-8')
     now = datetime.datetime.now()
@@ -328,36 +334,41 @@ def text_report(system, curves, grid, filename):
     f.write('       R (%pu) Xl (%pu) Bc (%pu)  P(MW) Q(Mvar) '
             ' P(MW) Q(Mvar) I/Imax(%)\n')
     for lt in lines:
+        k = flows.row(lt)
         f.write(f'{lt.orig.bus_id+1:2d}-{lt.dest.bus_id+1:<2d} '
                 f'{lt.Zpu.real*100:8.04f} '
                 f'{lt.Zpu.imag*100:8.04f} '
                 f'{lt.Ypu.imag*100:8.04f} '
-                f'{lt.Sper.real*100:6.02f} '
-                f'{lt.Sper.imag*100:7.02f} '
-                f'{lt.S2.real*100:6.02f} '
-                f'{lt.S2.imag*100:7.02f} '
-                f'{np.abs(lt.Ia)/lt.imax*100:9.02f}\n')
+                f'{flows.Sper[k].real*100:6.02f} '
+                f'{flows.Sper[k].imag*100:7.02f} '
+                f'{flows.S2[k].real*100:6.02f} '
+                f'{flows.S2[k].imag*100:7.02f} '
+                f'{flows.loading[k]:9.02f}\n')
     f.write('\n========\n')
     f.write('3. Trafos\n')
     f.write('========\n\n')
     f.write('Trafo Parametrization         Loss     Flow\n')
     f.write('      x+(%pu) x0(%pu) Config. Q(Mvar)  P(MW) Q(Mvar) S/Snom(%)\n')
     for tr in trafos:
+        k = flows.row(tr)
         f.write(f'{tr.orig.bus_id+1:2d}-{tr.dest.bus_id+1:<2d} '
                 f'{tr.Z1.imag*100:7.02f} '
                 f'{tr.Z0.imag*100:7.02f} '
                 f'{get_scheme(tr, is_tex=False)} '
-                f'{tr.Sper.imag*100:7.02f} '
-                f'{tr.S2.real*100:6.02f} '
-                f'{tr.S2.imag*100:7.02f} '
-                f'{np.abs(tr.S2)*1e8/tr.snom*100:9.02f}\n')
+                f'{flows.Sper[k].imag*100:7.02f} '
+                f'{flows.S2[k].real*100:6.02f} '
+                f'{flows.S2[k].imag*100:7.02f} '
+                f'{flows.loading[k]:9.02f}\n')
     f.close()
 
 
 def latex_report(system, curves, grid, filename):
+    from pylatex import Document, Section, Command, NoEscape, Figure, \
+        Subsection, MultiColumn, MultiRow, UnsafeCommand, LongTable, NewPage
     lines = system.lines
     trafos = system.trafos
     buses = system.buses
+    flows = system.branch_flows()
     geometry_options = {"tmargin": "1cm",
                         "lmargin": "1cm",
                         "rmargin": "1cm",
@@ -491,6 +502,7 @@ def latex_report(system, curves, grid, filename):
             tbl.end_table_last_footer()
 
             for i, lt in enumerate(lines):
+                k = flows.row(lt)
                 if i % 2 == 0:
                     color = 'lightgray'
                 else:
@@ -499,11 +511,11 @@ def latex_report(system, curves, grid, filename):
                              NoEscape('{:.04f}'.format(lt.Zpu.real * 100)),
                              NoEscape('{:.04f}'.format(lt.Zpu.imag * 100)),
                              NoEscape('{:.04f}'.format(lt.Ypu.imag * 100)),
-                             NoEscape('{:.02f}'.format(lt.Sper.real * 100)),
-                             NoEscape('{:.02f}'.format(lt.Sper.imag * 100)),
-                             NoEscape('{:.02f}'.format(lt.S2.real * 100)),
-                             NoEscape('{:.02f}'.format(lt.S2.imag * 100)),
-                             NoEscape('{:.02f}'.format(np.abs(lt.Ia) / lt.imax * 100))),
+                             NoEscape('{:.02f}'.format(flows.Sper[k].real * 100)),
+                             NoEscape('{:.02f}'.format(flows.Sper[k].imag * 100)),
+                             NoEscape('{:.02f}'.format(flows.S2[k].real * 100)),
+                             NoEscape('{:.02f}'.format(flows.S2[k].imag * 100)),
+                             NoEscape('{:.02f}'.format(flows.loading[k]))),
                             color=color)
     with doc.create(Section('Trafos')):
         with doc.create(LongTable('c|ccccccc')) as tbl:
@@ -526,6 +538,7 @@ def latex_report(system, curves, grid, filename):
             tbl.end_table_last_footer()
 
             for i, tr in enumerate(trafos):
+                k = flows.row(tr)
                 if i % 2 == 0:
                     color = 'lightgray'
                 else:
@@ -534,14 +547,14 @@ def latex_report(system, curves, grid, filename):
                              NoEscape('{:.02f}'.format(tr.Z1.imag * 100)),
                              NoEscape('{:.02f}'.format(tr.Z0.imag * 100)),
                              get_scheme(tr),
-                             NoEscape('{:.02f}'.format(tr.Sper.imag * 100)),
-                             NoEscape('{:.02f}'.format(tr.S2.real * 100)),
-                             NoEscape('{:.02f}'.format(tr.S2.imag * 100)),
-                             NoEscape('{:.02f}'.format(np.abs(tr.S2) * 1e8 / tr.snom * 100))),
+                             NoEscape('{:.02f}'.format(flows.Sper[k].imag * 100)),
+                             NoEscape('{:.02f}'.format(flows.S2[k].real * 100)),
+                             NoEscape('{:.02f}'.format(flows.S2[k].imag * 100)),
+                             NoEscape('{:.02f}'.format(flows.loading[k]))),
                             color=color)
 
     filepath = filename.strip('.pdf')
-    make_system_schematic(curves, grid, initial_fontsize=9)
+    make_system_schematic(system, curves, grid, initial_fontsize=9)
     doc.append(NewPage())
     with doc.create(Section('System')):
         with doc.create(Figure(position='h')) as system_pic:
@@ -0,0 +1,225 @@
+import copy
+import os
+import pickle
+import tempfile
+
+import numpy as np
+
+from .contingency import outage_admittance, slack_component
+from .core import BranchFlows
+from .lazy import LazyModule
+from .methods import gauss_seidel, newton_raphson
+
+sparse = LazyModule('scipy.sparse')
+
+# NetworkSnapshot of a worker process and the file it was read from
+WORKER = {}
+
+__all__ = ['run_scenarios', 'NetworkSnapshot', 'ScenarioResult']
+
+
+class NetworkSnapshot(object):
+    """Compact picklable copy of what the load flow of a PowerSystem needs
+
+    Holds Ybus and the bus and branch tables, without the element objects,
+    so that it can be shipped to worker processes.
+    """
+    def __init__(self, system):
+        self.Y = system.Y
+        self.buses = system.bus_table
+        self.branches = copy.copy(system.branch_table)
+        self.branches.rows = {}
+        self.candidates = system.topology.candidates
+
+    def solve(self, scenario, method='newton', Nmax=100, eps=1e-12):
+        """Solves one scenario
+
+        Islands split off by the outages are energized as in n_minus_1.
+
+        Parameters
+        ----------
+        scenario: dict
+            May give the ``pl``, ``ql`` and ``pg`` of every bus (arrays in
+            ``buses`` order) and the branch table rows of the ``outages``
+        method: {'newton', 'gauss_seidel'}, optional
+        Nmax: int, optional
+            Maximum number of iterations
+        eps: float, optional
+            Tolerance
+
+        Returns
+        -------
+        result: SolverResult
+        V: array, shape (N,)
+            Bus voltages in ``buses`` order, zero where not energized
+        flows: BranchFlows
+        """
+        buses = self.buses
+        branches = self.branches
+        Y = self.Y
+        V0, S0 = buses.flow_inputs(pl=scenario.get('pl'), ql=scenario.get('ql'),
+                                   pg=scenario.get('pg'))
+        M = V0.size
+        node1 = buses.index[branches.orig]
+        node2 = buses.index[branches.dest]
+        in_service = node1 >= 0
+        outages = np.asarray(scenario.get('outages', ()), int)
+        keep = np.ones(M, bool)
+        if outages.size > 0:
+            outages = outages[in_service[outages]]
+            dY = outage_admittance(Y, branches, node1, node2, outages)
+            Y = Y + dY if sparse.issparse(Y) else Y + dY.toarray()
+            in_service[outages] = False
+            keep, slacks = slack_component(M, node1, node2, in_service, self.candidates)
+            Y = Y[keep][:, keep]
+            # the slack buses of the islands split off hold their stored voltage
+            new = slacks[np.isfinite(S0[slacks, 0])]
+            rows = np.flatnonzero(np.isin(buses.index, new))
+            V0 = V0.copy()
+            V0[buses.index[rows]] = buses.V[rows]
+            S0[new] = np.nan
+        if method == 'newton':
+            result = newton_raphson(Y, V0[keep], S0[keep], eps=eps, Nmax=Nmax)
+        elif method == 'gauss_seidel':
+            result = gauss_seidel(Y, V0[keep], S0[keep], eps=eps, Nmax=Nmax)
+        else:
+            raise ValueError("unknown load flow method '{}'".format(method))
+        Vm = np.zeros(M, complex)
+        Vm[keep] = result.V
+        V = np.zeros(len(buses), complex)
+        V[buses.energized] = Vm[buses.index[buses.energized]]
+        flows = BranchFlows(V, branches)
+        flows.S1[outages] = flows.S2[outages] = flows.loading[outages] = 0.
+        return result, V, flows
+
+
+class ScenarioResult(object):
+    """Preallocated results of a batch of scenarios
+
+    Attributes
+    ----------
+    V: array, shape (K, N)
+        Bus voltages, in ``buses`` order
+    S1, S2: array, shape (K, B)
+        Branch flows, following the branch table
+    loading: array, shape (K, B)
+        I/Imax of lines and S/Snom of transformers (%)
+    niter: array, shape (K,)
+        Number of solver iterations
+    converged: array, shape (K,)
+        Whether each scenario converged
+    reason: array of str, shape (K,)
+        Why the solver of each scenario stopped, see SolverResult
+    elapsed: array, shape (K,)
+        Solver time of each scenario (s)
+    errors: list
+        Exception raised by each scenario, as a string, or None
+    """
+    def __init__(self, K, N, B):
+        self.V = np.zeros((K, N), complex)
+        self.S1 = np.zeros((K, B), complex)
+        self.S2 = np.zeros((K, B), complex)
+        self.loading = np.zeros((K, B))
+        self.niter = np.zeros(K, int)
+        self.converged = np.zeros(K, bool)
+        self.reason = np.zeros(K, 'U10')
+        self.elapsed = np.zeros(K)
+        self.errors = [None] * K
+
+    def __len__(self):
+        return self.niter.size
+
+
+def solve_chunk(snapshot, scenarios, options):
+    outcomes = []
+    for scenario in scenarios:
+        try:
+            result, V, flows = snapshot.solve(scenario, **options)
+        except Exception as error:
+            outcomes.append(repr(error))
+        else:
+            outcomes.append((result.niter, result.converged, result.reason, result.time, V,
+                             flows.S1, flows.S2, flows.loading))
+    return outcomes
+
+
+def load_snapshot(path):
+    """NetworkSnapshot saved by run_scenarios, read once per worker process"""
+    if WORKER.get('path') != path:
+        with open(path, 'rb') as f:
+            WORKER['snapshot'] = pickle.load(f)
+        WORKER['path'] = path
+    return WORKER['snapshot']
+
+
+def solve_worker_chunk(path, scenarios, options):
+    return solve_chunk(load_snapshot(path), scenarios, options)
+
+
+def run_scenarios(system, scenarios, workers=None, chunksize=16, method='newton', Nmax=100,
+                  eps=1e-12):
+    """Solves independent load flow scenarios in worker processes
+
+    Parameters
+    ----------
+    system: PowerSystem object
+        Base case, which is left untouched
+    scenarios: list of dict
+        See NetworkSnapshot.solve
+    workers: int, optional
+        Number of worker processes, defaults to the number of CPUs. With a
+        single worker the scenarios are solved in this process.
+    chunksize: int, optional
+        Number of scenarios sent to a worker at a time
+    method: {'newton', 'gauss_seidel'}, optional
+    Nmax: int, optional
+        Maximum number of iterations per scenario
+    eps: float, optional
+        Tolerance
+
+    Returns
+    -------
+    result: ScenarioResult
+        Scenarios that raise are recorded in ``errors`` and left at zero
+    """
+    snapshot = NetworkSnapshot(system)
+    scenarios = list(scenarios)
+    options = dict(method=method, Nmax=Nmax, eps=eps)
+    result = ScenarioResult(len(scenarios), len(snapshot.buses), len(snapshot.branches))
+    starts = range(0, len(scenarios), chunksize)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        chunks = [solve_chunk(snapshot, scenarios[k:k + chunksize], options) for k in starts]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        # the snapshot, with its Ybus, is written once and read once per worker,
+        # the chunks only carry the path of the file
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'snapshot.pickle')
+            with open(path, 'wb') as f:
+                pickle.dump(snapshot, f, pickle.HIGHEST_PROTOCOL)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(solve_worker_chunk, path, scenarios[k:k + chunksize],
+                                           options) for k in starts]
+                chunks = []
+                for start, future in zip(starts, futures):
+                    try:
+                        chunks.append(future.result())
+                    except Exception as error:
+                        chunks.append([repr(error)] * len(scenarios[start:start + chunksize]))
+    for start, outcomes in zip(starts, chunks):
+        for k, outcome in enumerate(outcomes, start):
+            if isinstance(outcome, str):
+                result.errors[k] = outcome
+                continue
+            niter, converged, reason, elapsed, V, S1, S2, loading = outcome
+            result.niter[k] = niter
+            result.converged[k] = converged
+            result.reason[k] = reason
+            result.elapsed[k] = elapsed
+            result.V[k] = V
+            result.S1[k] = S1
+            result.S2[k] = S2
+            result.loading[k] = loading
+    return result
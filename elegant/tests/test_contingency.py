@@ -0,0 +1,60 @@
+import copy
+import unittest
+
+import numpy as np
+
+from elegant.contingency import n_minus_1
+from elegant.core import PowerSystem
+from elegant.tests.test_core import generator_island_system, ring_system, stevenson_system
+
+
+class ContingencyTests(unittest.TestCase):
+    def assertMatchesRemoval(self, system, result):
+        for k, row in enumerate(result.outages):
+            outaged = copy.deepcopy(system)
+            if row < len(outaged.lines):
+                outaged.remove_line(outaged.lines[row])
+            else:
+                outaged.remove_trafo(outaged.trafos[row - len(outaged.lines)])
+            outaged.update()
+            V = [bus.v * np.exp(1j * bus.delta) if bus.bus_id in outaged.hsh else 0.
+                 for bus in outaged.buses]
+            np.testing.assert_allclose(result.V[k], V, atol=1e-9)
+            np.testing.assert_allclose(result.islanded[k],
+                                       [bus.bus_id not in outaged.hsh for bus in outaged.buses])
+
+    def test_meshed(self):
+        for sparse in (False, True):
+            system = ring_system(PowerSystem(sparse=sparse))
+            system.update()
+            result = n_minus_1(system)
+            self.assertEqual(len(result), len(system.lines))
+            self.assertTrue(np.all(result.converged))
+            self.assertFalse(np.any(result.refactorized))
+            self.assertMatchesRemoval(system, result)
+            for outage, branch, loading in result.violations():
+                self.assertNotEqual(outage, branch)
+                self.assertGreater(loading, 100.)
+
+    def test_islanding(self):
+        system = stevenson_system(PowerSystem())
+        system.buses[1].pg = 0.
+        system.update()
+        result = n_minus_1(system, branches=system.trafos)
+        self.assertTrue(result.refactorized[0])
+        self.assertEqual(result.islanded[0].sum(), 2)
+        self.assertMatchesRemoval(system, result)
+
+    def test_generator_island(self):
+        system = generator_island_system(PowerSystem())
+        system.update()
+        result = n_minus_1(system, branches=system.lines[-2:])
+        self.assertTrue(np.all(result.converged))
+        self.assertFalse(result.islanded[0].any())
+        self.assertTrue(result.islanded[1, -1])
+        self.assertAlmostEqual(1.01, np.abs(result.V[0, -2]))
+        self.assertMatchesRemoval(system, result)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,14 @@
+import copy
+import os
+import pickle
+import tempfile
+import tracemalloc
 import unittest
 
 import numpy as np
 
 from elegant.core import PowerSystem, TransmissionLine, Transformer, Bus, STAR, DELTA
+from elegant.methods import newton_raphson, warm_start
 
 
 def ids_seq(system):
@@ -22,6 +28,57 @@ def buses_ids(system):
     return [b.bus_id for b in system.buses]
 
 
+def stevenson_system(system):
+    slack = system.add_bus()
+    pv = system.add_bus()
+    pq = system.add_bus()
+    system.add_line(TransmissionLine(pq, pv, ell=32e3, r=2.5e-2, d12=4.5,
+                                     d23=3.0, d31=7.5, d=0.4, m=2))
+    system.add_trafo(Transformer(slack, pq, jx0=0.12, jx1=0.12, secondary=DELTA))
+    slack.v = 1.01
+    pv.pg = 0.08
+    pv.v = 1.02
+    pq.pl = 0.12
+    pq.ql = 0.076
+    return system
+
+
+def ring_system(system):
+    buses = [system.add_bus() for _ in range(5)]
+    for k in range(5):
+        system.add_line(TransmissionLine(buses[k], buses[(k + 1) % 5], ell=30e3,
+                                         vbase=1.38e5, imax=300))
+    system.add_line(TransmissionLine(buses[1], buses[3], ell=50e3, vbase=1.38e5, imax=300))
+    buses[2].pg = 0.3
+    for k in (1, 3, 4):
+        buses[k].pl = 0.4
+        buses[k].ql = 0.1
+    return system
+
+
+def generator_island_system(system):
+    """Ring system feeding, through a single line, a generator with a load behind it"""
+    ring_system(system)
+    gen, load = system.add_bus(), system.add_bus()
+    system.add_line(TransmissionLine(system.buses[1], gen, ell=30e3, vbase=1.38e5))
+    system.add_line(TransmissionLine(gen, load, ell=20e3, vbase=1.38e5))
+    gen.pg = 0.2
+    gen.v = 1.01
+    load.pl = 0.1
+    load.ql = 0.02
+    return system
+
+
+def allocated(build, n=1000):
+    """Memory traced per object built"""
+    tracemalloc.start()
+    try:
+        objects = [build() for _ in range(n)]
+        return tracemalloc.get_traced_memory()[0] / len(objects)
+    finally:
+        tracemalloc.stop()
+
+
 class EightBusesCoreTests(unittest.TestCase):
     def setUp(self):
         self.system = PowerSystem()
@@ -42,6 +99,38 @@ class EightBusesCoreTests(unittest.TestCase):
         self.assertTrue(np.isclose(line.Zpu.imag, 3.6607, atol=1e-4))
         self.assertTrue(np.isclose(line.Ypu.imag, 4.554e-5, atol=1e-4))
 
+    def test_TL_memory(self):
+        # a slotted line must take less memory than the same attributes in a __dict__
+        class DictLine(object):
+            pass
+
+        line = TransmissionLine(0, 0)
+        self.assertFalse(hasattr(line, '_cache'))
+        state = line.__getstate__()
+
+        def dict_line():
+            other = DictLine()
+            other.__dict__.update(state)
+            return other
+
+        self.assertLess(allocated(lambda: TransmissionLine(0, 0)), allocated(dict_line))
+        system = PowerSystem()
+        line.watch(system)
+        self.assertLess(allocated(lambda: line.watch(system)), allocated(lambda: None) + 1.)
+
+    def test_TL_derived_parameters(self):
+        line = TransmissionLine(0, 0)
+        self.assertFalse(hasattr(line, '__dict__'))
+        Zpu = line.Zpu
+        self.assertIs(Zpu, line.Zpu)
+        line.ell = 2 * line.ell
+        self.assertTrue(np.isclose(line.Zpu, 2 * Zpu))
+        line.Z = 1
+        self.assertEqual(line.Zpu, 1e-8 * line.vbase ** 2)
+        copy = pickle.loads(pickle.dumps(line))
+        self.assertEqual(copy.param, line.param)
+        self.assertEqual(copy.Zpu, line.Zpu)
+
     def test_add_bus(self):
         curr_N = self.system.N
         self.system.add_bus()
@@ -55,6 +144,15 @@ class EightBusesCoreTests(unittest.TestCase):
         self.assertEqual(self.system.buses[0].bus_id, 0)
         self.assertEqual(len(self.system.lines), 7)
 
+    def test_topology_index(self):
+        buses = self.system.masked_buses
+        self.assertIs(buses, self.system.masked_buses)
+        self.assertEqual(list(range(8)), [self.system.hsh[i] for i in range(8)])
+        self.system.remove_line(self.system.lines[3])
+        self.assertEqual(4, self.system.M)
+        self.assertEqual(3, len(self.system.masked_lines))
+        self.assertEqual([0, 1, 2, 3], self.system.good_ids)
+
     def test_slack_remove(self):
         self.system.remove_bus(self.system.id2n(0))
         self.assertFalse(0 in [b.bus_id for b in self.system.buses])
@@ -181,6 +279,274 @@ class RealCasesCoreTests(unittest.TestCase):
         self.system.update()
         self.assertTrue(np.isclose(pv.delta * 180 / np.pi, 48.125, atol=1e-5))
 
+    def test_fast_decoupled_flow(self):
+        stevenson_system(self.system)
+        V, _ = self.system.update_flow()
+        for method in ('fdxb', 'fdbx'):
+            V_fd, _ = self.system.update_flow(method=method)
+            self.assertTrue(np.allclose(V, V_fd))
+        with self.assertRaises(ValueError):
+            self.system.update_flow(method='gauss')
+
+    def test_sparse_backend(self):
+        dense = stevenson_system(PowerSystem())
+        sparse = stevenson_system(PowerSystem(sparse=True))
+        dense.update()
+        sparse.update()
+        self.assertTrue(np.allclose(dense.Y, sparse.Y.toarray()))
+        self.assertTrue(np.allclose(dense.Y0, sparse.Y0.toarray()))
+        self.assertTrue(np.allclose(dense.Y1, sparse.Y1.toarray()))
+        for b1, b2 in zip(dense.buses, sparse.buses):
+            self.assertAlmostEqual(b1.v, b2.v)
+            self.assertAlmostEqual(b1.delta, b2.delta)
+            self.assertAlmostEqual(b1.iTPG, b2.iTPG)
+            self.assertAlmostEqual(b1.iSLG, b2.iSLG)
+
+    def test_cached_matrices(self):
+        stevenson_system(self.system)
+        self.system.update()
+        Y, Y0, Y1 = self.system.Y, self.system.Y0, self.system.Y1
+        self.system.update()
+        self.assertIs(Y, self.system.Y)
+        self.assertIs(Y0, self.system.Y0)
+        self.assertIs(Y1, self.system.Y1)
+        self.system.buses[2].pl = 0.2
+        self.assertIs(Y, self.system.Y)
+        self.assertIsNot(Y1, self.system.Y1)
+        self.system.lines[0].ell = 40e3
+        self.assertIsNot(Y, self.system.Y)
+        Y = self.system.Y
+        self.system.add_bus()
+        self.assertIsNot(Y, self.system.Y)
+
+    def test_cached_matrices_per_system(self):
+        stevenson_system(self.system)
+        other = stevenson_system(PowerSystem())
+        Y1 = self.system.Y1
+        owners = [element._owners for element in self.system.buses + self.system.lines]
+        self.assertTrue(all(owner is owners[0] for owner in owners))
+        other.buses[2].pl = 0.2
+        other.Y1
+        self.assertIs(Y1, self.system.Y1)
+        snapshot = copy.deepcopy(self.system)
+        snapshot.update()
+        snapshot.lines[0].ell = 40e3
+        self.assertIs(Y1, self.system.Y1)
+        self.assertIsNot(snapshot.Y1, self.system.Y1)
+        self.system.buses[2].pl = 0.2
+        self.assertIsNot(Y1, self.system.Y1)
+
+    def test_tolerance(self):
+        stevenson_system(self.system)
+        self.system.update(warm=False)
+        tight = self.system.solver_results[0]
+        self.system.update(warm=False, eps=1e-4)
+        loose = self.system.solver_results[0]
+        self.assertEqual('converged', loose.reason)
+        self.assertLess(loose.niter, tight.niter)
+        self.assertLessEqual(tight.delta, 1e-12)
+
+    def test_warm_start(self):
+        stevenson_system(self.system)
+        self.system.update()
+        self.system.buses[2].pl = 0.13
+        V, S = self.system.update_flow(warm=True)
+        Vflat, Sflat = self.system.update_flow(warm=False)
+        self.assertTrue(np.allclose(V, Vflat))
+        V0, S0 = self.system.flow_inputs()
+        warm = warm_start(V0, S0, V)
+        self.assertEqual(warm[0], V0[0])
+        self.assertEqual(np.abs(warm[1]), np.abs(V0[1]))
+        self.assertLess(newton_raphson(self.system.Y, warm, S0, eps=1e-12).niter,
+                        newton_raphson(self.system.Y, V0, S0, eps=1e-12).niter)
+        self.system.add_bus()
+        V, S = self.system.update_flow()
+        self.assertEqual(V.size, self.system.M)
+
+    def test_lazy_faults(self):
+        stevenson_system(self.system)
+        self.system.buses[0].xd = 0.2
+        self.system.buses[0].gen_ground = True
+        self.system.update()
+        self.assertNotIn('faults', self.system._matrices)
+        bus = self.system.buses[2]
+        If = self.system.short_circuit([bus])
+        self.assertEqual((1, 4, 3), If.shape)
+        self.assertEqual(1, len(self.system._matrices['faults'][1]))
+        self.assertEqual(bus.iTPG, If[0, 0, 0])
+        self.assertEqual(bus.iLL, If[0, 3, 1])
+        self.assertTrue(np.allclose(self.system.short_circuit(), self.system.update_short()))
+        self.system.buses[0].xd = 0.1
+        self.assertNotEqual(bus.iTPG, If[0, 0, 0])
+        bus.iSLG = 0.
+        self.assertEqual(bus.iSLG, 0.)
+        self.assertEqual(bus.iTPG, self.system.short_circuit([bus])[0, 0, 0])
+
+    def test_instrumentation(self):
+        stevenson_system(self.system)
+        self.system.buses[0].xd = 0.2
+        self.system.buses[0].gen_ground = True
+        seen = []
+        stats = self.system.instrument(lambda name, elapsed, size: seen.append(name))
+        self.system.update()
+        self.system.update_short()
+        self.assertEqual(['topology', 'ybus', 'flow_inputs', 'solve', 'mismatch', 'update_flow',
+                          'write_back', 'update', 'sequence_ybus', 'short', 'update_short'], seen)
+        self.assertEqual(3, stats.size['solve'])
+        self.assertGreaterEqual(stats.time['update'], stats.time['update_flow'])
+        self.assertIn('update_flow', str(stats))
+        self.assertIsNone(pickle.loads(pickle.dumps(self.system)).stats)
+        self.system.stats = None
+        self.system.update()
+        self.assertEqual(1, stats.calls['update'])
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'update.prof')
+            profile = self.system.profile(filename, warm=False)
+            self.assertTrue(os.path.exists(filename))
+        self.assertGreater(profile.total_calls, 0)
+
+    def test_tables(self):
+        stevenson_system(self.system)
+        self.system.update()
+        buses = self.system.bus_table
+        branches = self.system.branch_table
+        self.assertEqual(len(buses), len(self.system.buses))
+        self.assertEqual(len(branches), len(self.system.lines) + len(self.system.trafos))
+        np.testing.assert_allclose(buses.v, [bus.v for bus in self.system.buses])
+        np.testing.assert_allclose(buses.pl, [bus.pl for bus in self.system.buses])
+        np.testing.assert_allclose(branches.z[:len(self.system.lines)],
+                                   [line.Zpu for line in self.system.lines])
+        self.assertIs(buses, self.system.bus_table)
+        self.system.buses[1].ql = 0.1
+        self.assertIsNot(buses, self.system.bus_table)
+        self.assertEqual(self.system.bus_table.ql[1], 0.1)
+        self.assertIs(branches, self.system.branch_table)
+        Y1 = self.system.Y1
+        bus = self.system.buses[1]
+        node = self.system.hsh[bus.bus_id]
+        np.testing.assert_allclose(Y1[node, node] - self.system.Y[node, node], 1 / bus.Z)
+
+    def test_branch_flows(self):
+        stevenson_system(self.system)
+        self.system.update()
+        flows = self.system.branch_flows()
+        self.assertEqual(len(flows), 2)
+        for branch in self.system.lines + self.system.trafos:
+            k = flows.row(branch)
+            self.assertTrue(np.isclose(flows.S1[k], branch.S1))
+            self.assertTrue(np.isclose(flows.S2[k], branch.S2))
+            self.assertTrue(np.isclose(flows.Sper[k], branch.Sper))
+            self.assertTrue(np.isclose(flows.Ipu[k], branch.Ipu))
+        line = self.system.lines[0]
+        self.assertTrue(np.isclose(flows.Ia[flows.row(line)], line.Ia))
+        trafo = self.system.trafos[0]
+        self.assertTrue(np.isclose(flows.loading[flows.row(trafo)],
+                                   np.abs(trafo.S2) * 1e8 / trafo.snom * 100))
+
+    def test_dc_flow(self):
+        ring_system(self.system)
+        theta, flows = self.system.dc_flow()
+        self.system.update()
+        self.assertTrue(np.allclose(flows, self.system.branch_flows().S1.real, atol=5e-3))
+        P = np.zeros(self.system.M)
+        for bus in self.system.buses:
+            P[self.system.hsh[bus.bus_id]] = bus.pg - bus.pl
+        self.assertTrue(np.allclose(self.system.ptdf.dot(P), flows))
+        lodf = self.system.lodf
+        ptdf = self.system.ptdf
+        self.assertIs(lodf, self.system.lodf)
+        outage = self.system.lines[1]
+        self.system.remove_line(outage)
+        self.assertIsNot(ptdf, self.system.ptdf)
+        _, flows_after = self.system.dc_flow(P)
+        self.assertTrue(np.allclose(np.delete(flows + lodf[:, 1] * flows[1], 1), flows_after))
+
+    def test_lodf_islanding(self):
+        stevenson_system(self.system)
+        self.assertTrue(np.all(np.isnan(np.diag(self.system.lodf, -1))))
+        self.assertTrue(np.all(np.diag(self.system.lodf) == -1))
+
+    def test_islands(self):
+        stevenson_system(self.system)
+        gen, load, bus, dead = [self.system.add_bus() for _ in range(4)]
+        self.system.add_line(TransmissionLine(gen, load, ell=20e3, vbase=1.38e5))
+        self.system.add_line(TransmissionLine(bus, dead, ell=20e3, vbase=1.38e5))
+        gen.pg = 0.1
+        gen.v = 1.02
+        load.pl = 0.1
+        load.ql = 0.02
+        dead.v = 0.97
+        self.assertEqual(5, self.system.M)
+        self.assertEqual([bus, dead], list(self.system.dead_buses))
+        self.assertEqual([0, 3], list(self.system.topology.slacks))
+        self.system.update(workers=2)
+        self.assertEqual(['converged'] * 2,
+                         [result.reason for result in self.system.solver_results])
+        stevenson = stevenson_system(PowerSystem())
+        stevenson.update()
+        other = PowerSystem()
+        other.add_line(TransmissionLine(other.add_bus(), other.add_bus(), ell=20e3, vbase=1.38e5))
+        other.buses[0].v = 1.02
+        other.buses[1].pl = 0.1
+        other.buses[1].ql = 0.02
+        other.update()
+        for expected, solved in zip(stevenson.buses + other.buses, self.system.buses):
+            self.assertAlmostEqual(expected.v, solved.v)
+            self.assertAlmostEqual(expected.delta, solved.delta)
+        self.assertEqual((0.97, 0., 0.), (dead.v, dead.delta, dead.iTPG))
+        self.assertEqual(0., self.system.lines[-1].v1)
+        theta, _ = self.system.dc_flow()
+        self.assertTrue(np.all(theta[self.system.topology.slacks] == 0))
+        self.system.set_slack(load)
+        self.system.update()
+        self.assertEqual([0, 4], list(self.system.topology.slacks))
+        self.assertAlmostEqual(1.02, gen.v)
+        gen.pg = 0.
+        self.system.set_slack(load, False)
+        self.assertEqual(3, self.system.M)
+        self.assertIn(load, self.system.dead_buses)
+
+    def test_island_energized_by_generation(self):
+        stevenson_system(self.system)
+        c, d = self.system.add_bus(), self.system.add_bus()
+        self.system.add_line(TransmissionLine(c, d, ell=20e3, vbase=1.38e5))
+        self.assertEqual((3, 3), self.system.Y.shape)
+        self.assertEqual(3, self.system.ptdf.shape[1])
+        c.pg = 0.1
+        self.assertEqual((5, 5), self.system.Y.shape)
+        self.assertEqual(5, self.system.ptdf.shape[1])
+
+    def test_failed_island_setpoints(self):
+        stevenson_system(self.system)
+        a, b = self.system.add_bus(), self.system.add_bus()
+        self.system.add_line(TransmissionLine(a, b, ell=200e3, vbase=1.38e5))
+        a.pg = 0.1
+        b.pl = 2.
+        self.system.update()
+        self.assertEqual('power mismatch!', self.system.status)
+        self.assertEqual(2, self.system.unsolved.sum())
+        self.assertEqual((0.1, 1.0, 1.0), (a.pg, a.v, b.v))
+        b.pl = 0.01
+        self.system.update()
+        self.assertEqual(5, self.system.M)
+        self.assertFalse(self.system.unsolved.any())
+        self.assertGreater(a.pg, 0.01)
+
+    def test_dead_island_setpoints(self):
+        stevenson_system(self.system)
+        a, b = self.system.add_bus(), self.system.add_bus()
+        self.system.add_line(TransmissionLine(a, b, ell=20e3, vbase=1.38e5))
+        a.v = 1.03
+        b.pl = 0.05
+        self.system.update()
+        self.assertEqual((1.03, 0.), (a.v, a.pg))
+        self.system.set_slack(a)
+        self.system.update()
+        self.assertNotIn('singular', self.system.status)
+        self.assertEqual(['converged'] * 2,
+                         [result.reason for result in self.system.solver_results])
+        self.assertAlmostEqual(1.03, a.v)
+
 
 if __name__ == '__main__':
     unittest.main()
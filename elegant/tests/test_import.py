@@ -0,0 +1,45 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from elegant import PACKAGEDIR
+
+HEAVY = ('networkx', 'scipy', 'matplotlib', 'pylatex', 'PyQt5')
+# time that import elegant may add to the import of numpy (s)
+BUDGET = 0.1
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [m for m in {!r} if m in sys.modules]]))
+"""
+
+
+def fresh_import(module, repeat=3):
+    """Best time of importing module in a new interpreter, and the heavy modules it loaded"""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(PACKAGEDIR))
+    # the first run caches the bytecode, as an installed package would have it
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    runs = [json.loads(subprocess.check_output([sys.executable, '-c', SCRIPT.format(module, HEAVY)],
+                                               env=env, universal_newlines=True))
+            for _ in range(repeat + 1)]
+    return min(elapsed for elapsed, _ in runs[1:]), runs[-1][1]
+
+
+class TestImport(unittest.TestCase):
+    def test_heavy_modules_deferred(self):
+        _, loaded = fresh_import('elegant', repeat=1)
+        self.assertEqual(loaded, [])
+
+    def test_import_time(self):
+        baseline, _ = fresh_import('numpy')
+        elapsed, _ = fresh_import('elegant')
+        self.assertLess(elapsed - baseline, BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
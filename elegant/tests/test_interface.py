@@ -1,4 +1,6 @@
+import copy
 import sys
+import time
 import unittest
 
 from PyQt5.QtWidgets import QWidget, QLayout, QApplication, \
@@ -114,6 +116,25 @@ class InterfaceTests(unittest.TestCase):
     def test_empty_string_input(self):
         pass
 
+    def test_background_solve(self):
+        self.elegantqt.load_test_session()
+        system = self.main_widget.system
+        k = max(range(system.N), key=lambda i: system.buses[i].pl)
+        expected = copy.deepcopy(system)
+        expected.buses[k].pl *= 1.2
+        expected.update(Nmax=self.main_widget.max_niter)
+        system.buses[k].pl *= 1.2
+        self.main_widget.update_values()
+        self.main_widget.update_values()
+        deadline = time.time() + 10
+        while self.main_widget.solve_timer.isActive() and time.time() < deadline:
+            app.processEvents()
+        self.main_widget.solve_pool.waitForDone()
+        app.processEvents()
+        for bus, expected_bus in zip(system.buses, expected.buses):
+            self.assertAlmostEqual(bus.v, expected_bus.v)
+            self.assertAlmostEqual(bus.delta, expected_bus.delta)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,9 +1,12 @@
 import unittest
 
 import numpy as np
+from scipy import sparse
 
 from elegant.core import TransmissionLine
-from elegant.methods import gauss_seidel, newton_raphson
+from elegant.methods import bus_types, chord_newton, factorize, fast_decoupled, \
+    gauss_seidel, newton_raphson, polar_jacobian, short, woodbury, zbus_diagonal, \
+    SingularMatrixError
 
 
 class TestMethods(unittest.TestCase):
@@ -29,6 +32,19 @@ class TestMethods(unittest.TestCase):
         self.assertAlmostEqual(-0.3078, np.rad2deg(np.angle(v[2])), places=4)
         self.assertLess(1e-12, delta)
 
+    def test_gauss_seidel_sparse(self):
+        _, _, v_dense = gauss_seidel(self.Y, self.V0, self.S0, Niter=5)
+        _, _, v_sparse = gauss_seidel(sparse.csr_matrix(self.Y), self.V0, self.S0, Niter=5)
+        self.assertTrue(np.allclose(v_dense, v_sparse))
+
+    def test_gauss_seidel_variants(self):
+        _, _, v_newton = newton_raphson(self.Y, self.V0, self.S0, eps=1e-12, Nmax=20)
+        for kwargs in [dict(omega=1.2), dict(jacobi=True), dict(jacobi=True, omega=0.8)]:
+            result = gauss_seidel(sparse.csr_matrix(self.Y), self.V0, self.S0,
+                                  eps=1e-10, Nmax=5000, **kwargs)
+            self.assertTrue(result.converged, kwargs)
+            self.assertTrue(np.allclose(result.V, v_newton, atol=1e-8), kwargs)
+
     def test_newton_raphson(self):
         niter, delta, v = newton_raphson(self.Y, self.V0, self.S0, Niter=2)
         self.assertEqual(2, niter)
@@ -39,6 +55,108 @@ class TestMethods(unittest.TestCase):
         self.assertAlmostEqual(-0.2804, np.rad2deg(np.angle(v[2])), places=5)
         self.assertLess(1e-12, delta)
 
+    def test_newton_raphson_sparse(self):
+        _, _, v_dense = newton_raphson(self.Y, self.V0, self.S0, eps=1e-12, Nmax=20)
+        _, _, v_sparse = newton_raphson(sparse.csr_matrix(self.Y), self.V0, self.S0,
+                                        eps=1e-12, Nmax=20)
+        self.assertTrue(np.allclose(v_dense, v_sparse))
+
+    def test_fast_decoupled(self):
+        B = -self.Y.imag
+        niter, delta, v = fast_decoupled(self.Y, self.V0, self.S0, B, B, eps=1e-12, Nmax=100)
+        _, _, v_newton = newton_raphson(self.Y, self.V0, self.S0, eps=1e-12, Nmax=20)
+        self.assertLess(delta, 1e-12)
+        self.assertTrue(np.allclose(v, v_newton))
+
+    def test_short(self):
+        Y1 = self.Y + np.diag([-1j / 0.2, -1j / 0.25, 0.])
+        Y0 = self.Y + np.diag([-1j / 0.1, 0., 1.])
+        V = np.array([1.01, 1.02 * np.exp(0.8j), 0.99 * np.exp(-0.01j)])
+        If = short(Y1, Y0, V)
+        self.assertEqual((3, 4, 3), If.shape)
+        Z1 = np.diag(np.linalg.inv(Y1))
+        Z0 = np.diag(np.linalg.inv(Y0))
+        self.assertTrue(np.allclose(If[:, 0, 0], V / Z1))
+        self.assertTrue(np.allclose(If[:, 1, 0], 3 * V / (2 * Z1 + Z0)))
+        self.assertTrue(np.allclose(If[:, 1, 1:], 0.))
+        self.assertTrue(np.allclose(np.abs(If[:, 3, 1]), np.sqrt(3) * np.abs(V / (2 * Z1))))
+        self.assertTrue(np.allclose(If[:, 3, 0], 0.))
+        self.assertTrue(np.allclose(short(Y1, Y0, V, index=[2, 0]), If[[2, 0]]))
+        self.assertTrue(np.allclose(If[:, 2].sum(axis=1), 3 * (-V / (Z1 + 2 * Z0))))
+
+    def test_selected_inversion(self):
+        Y1 = self.Y + np.diag([-1j / 0.2, -1j / 0.25, 0.])
+        Y0 = self.Y + np.diag([-1j / 0.1, 0., 1.])
+        V = np.array([1.01, 1.02 * np.exp(0.8j), 0.99 * np.exp(-0.01j)])
+        self.assertTrue(np.allclose(zbus_diagonal(Y1), np.diag(np.linalg.inv(Y1))))
+        self.assertTrue(np.allclose(zbus_diagonal(sparse.csr_matrix(Y1), index=[2, 0], block=1),
+                                    np.diag(np.linalg.inv(Y1))[[2, 0]]))
+        If = short(Y1, Y0, V)
+        self.assertTrue(np.allclose(short(Y1, Y0, V, inversion='selected'), If))
+        self.assertTrue(np.allclose(short(sparse.csr_matrix(Y1), sparse.csr_matrix(Y0), V,
+                                          inversion='selected'), If))
+
+    def test_singular_jacobian(self):
+        Y = np.zeros((3, 3), complex)
+        result = newton_raphson(Y, self.V0, self.S0, Niter=2)
+        self.assertEqual('singular', result.reason)
+        self.assertFalse(result.converged)
+        self.assertEqual(0, result.niter)
+        self.assertTrue(np.allclose(result.V, self.V0))
+
+    def test_factorize(self):
+        A = np.array([[4., 1.], [1., 3.]])
+        b = np.array([1., 2.])
+        self.assertTrue(np.allclose(factorize(A)(b), np.linalg.solve(A, b)))
+        self.assertTrue(np.allclose(factorize(sparse.csr_matrix(A))(b), np.linalg.solve(A, b)))
+        with self.assertRaises(SingularMatrixError):
+            factorize(np.array([[1., 2.], [2., 4.]]))
+        with self.assertRaises(SingularMatrixError):
+            factorize(sparse.csr_matrix(np.array([[1., 0.], [0., 0.]])))
+
+    def test_woodbury(self):
+        A = np.array([[4., 1., 0.], [1., 3., 1.], [0., 1., 5.]])
+        C = np.array([[0., -1., 2.]])
+        b = np.array([1., 2., 3.])
+        A1 = A.copy()
+        A1[1] += C[0]
+        solve = woodbury(factorize(A), np.array([1]), C)
+        self.assertTrue(np.allclose(solve(b), np.linalg.solve(A1, b)))
+        with self.assertRaises(SingularMatrixError):
+            woodbury(factorize(A), np.array([1]), -A[1:2])
+
+    def test_chord_newton(self):
+        unknowns = np.array([1, 2, 5])
+        J = polar_jacobian(self.V0, self.Y)[unknowns][:, unknowns]
+        result = chord_newton(self.Y, self.V0, self.S0, factorize(J), eps=1e-12, Nmax=100)
+        self.assertTrue(result.converged)
+        self.assertTrue(np.allclose(result.V, newton_raphson(self.Y, self.V0, self.S0,
+                                                             eps=1e-12).V))
+
+    def test_solver_telemetry(self):
+        seen = []
+        result = newton_raphson(self.Y, self.V0, self.S0, eps=1e-12,
+                                callback=lambda k, mismatch, step, V: seen.append((k, step)))
+        self.assertEqual('converged', result.reason)
+        self.assertEqual(result.niter, len(seen))
+        self.assertEqual(result.niter, result.mismatch.size)
+        self.assertEqual(result.step[-1], result.delta)
+        self.assertLess(result.mismatch[-1], 1e-9 * result.mismatch[0])
+        self.assertTrue(np.all(np.diff(result.elapsed) >= 0))
+        stopped = gauss_seidel(self.Y, self.V0, self.S0, eps=1e-12,
+                               callback=lambda k, mismatch, step, V: k == 3)
+        self.assertEqual(('stopped', 3), (stopped.reason, stopped.niter))
+        Bp = -self.Y.imag
+        result = fast_decoupled(self.Y, self.V0, self.S0, Bp, Bp, eps=1e-12)
+        self.assertEqual(result.niter, result.step.size)
+        self.assertGreater(result.time, 0.)
+
+    def test_bus_types(self):
+        pv, pq, slack = bus_types(self.S0)
+        self.assertEqual([1], list(pv))
+        self.assertEqual([2], list(pq))
+        self.assertEqual([0], list(slack))
+
     def test_scalc(self):
         niter, delta, v = newton_raphson(self.Y, self.V0, self.S0, Niter=2)
         s = v * np.conjugate(np.dot(self.Y, v))
@@ -48,6 +166,21 @@ class TestMethods(unittest.TestCase):
         s_fixed = np.isfinite(self.S0)
         self.assertTrue(np.allclose(s_calc[s_fixed], self.S0[s_fixed], atol=1e-3))
 
+    def test_polar_jacobian(self):
+        N = self.V0.size
+        v = self.V0 * np.exp(1j * np.array([0., 0.1, -0.05]))
+        x = np.concatenate([np.angle(v), np.abs(v)])
+
+        def injections(x):
+            s = x[N:] * np.exp(1j * x[:N])
+            s = s * np.conjugate(np.dot(self.Y, s))
+            return np.concatenate([s.real, s.imag])
+
+        h = 1e-7
+        J = np.array([(injections(x + h * e) - injections(x - h * e)) / (2 * h)
+                      for e in np.eye(2 * N)]).T
+        self.assertTrue(np.allclose(polar_jacobian(v, self.Y), J, atol=1e-5))
+
 
 if __name__ == '__main__':
     unittest.main()
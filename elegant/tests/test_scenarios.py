@@ -0,0 +1,62 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+import numpy as np
+
+from elegant.contingency import n_minus_1
+from elegant.core import PowerSystem
+from elegant.scenarios import NetworkSnapshot, load_snapshot, run_scenarios
+from elegant.tests.test_core import generator_island_system, ring_system
+from elegant.timeseries import time_series
+
+
+class ScenarioTests(unittest.TestCase):
+    def setUp(self):
+        self.system = ring_system(PowerSystem())
+        self.system.update()
+        pl = np.array([bus.pl for bus in self.system.buses])
+        self.pl = np.outer(np.linspace(.5, 1.2, 5), pl)
+
+    def test_loads(self):
+        ref = time_series(self.system, pl=self.pl)
+        for workers in (1, 2):
+            result = run_scenarios(self.system, [{'pl': pl} for pl in self.pl],
+                                   workers=workers, chunksize=2)
+            self.assertTrue(np.all(result.converged))
+            np.testing.assert_allclose(result.V, ref.V, atol=1e-9)
+            np.testing.assert_allclose(result.loading, ref.loading, atol=1e-6)
+
+    def test_outages_and_failures(self):
+        ref = n_minus_1(self.system)
+        scenarios = [{'outages': [row]} for row in ref.outages]
+        scenarios.insert(2, {'pl': np.ones(2)})
+        result = run_scenarios(self.system, scenarios, workers=2, chunksize=3)
+        self.assertIsNotNone(result.errors[2])
+        self.assertFalse(result.converged[2])
+        keep = np.arange(len(scenarios)) != 2
+        self.assertTrue(all(error is None for error in np.array(result.errors)[keep]))
+        np.testing.assert_allclose(result.V[keep], ref.V, atol=1e-9)
+        np.testing.assert_allclose(result.S1[keep], ref.S1, atol=1e-9)
+
+    def test_snapshot_read_once(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'snapshot.pickle')
+            with open(path, 'wb') as f:
+                pickle.dump(NetworkSnapshot(self.system), f)
+            snapshot = load_snapshot(path)
+            os.remove(path)
+            self.assertIs(snapshot, load_snapshot(path))
+
+    def test_generator_island(self):
+        system = generator_island_system(PowerSystem())
+        system.update()
+        ref = n_minus_1(system, branches=system.lines[-2:])
+        result = run_scenarios(system, [{'outages': [row]} for row in ref.outages], workers=1)
+        self.assertTrue(np.all(result.converged))
+        np.testing.assert_allclose(result.V, ref.V, atol=1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+
+from elegant.core import PowerSystem
+from elegant.tests.test_core import stevenson_system
+from elegant.timeseries import time_series
+
+
+class TimeSeriesTests(unittest.TestCase):
+    def setUp(self):
+        self.system = stevenson_system(PowerSystem())
+        self.system.update()
+        self.pl = np.outer(np.linspace(.5, 1.5, 4), [bus.pl for bus in self.system.buses])
+
+    def test_matches_update(self):
+        out = time_series(self.system, pl=self.pl)
+        self.assertTrue(np.all(out.converged))
+        for t in range(self.pl.shape[0]):
+            for bus, pl in zip(self.system.buses, self.pl[t]):
+                bus.pl = pl
+            self.system.update()
+            V = [bus.v * np.exp(1j * bus.delta) for bus in self.system.buses]
+            np.testing.assert_allclose(out.V[t], V, atol=1e-9)
+            flows = self.system.branch_flows()
+            np.testing.assert_allclose(out.S1[t], flows.S1, atol=1e-9)
+            np.testing.assert_allclose(out.loading[t], flows.loading, atol=1e-7)
+
+    def test_methods(self):
+        ref = time_series(self.system, pl=self.pl)
+        for method in ('fdxb', 'fdbx', 'gauss_seidel'):
+            out = time_series(self.system, pl=self.pl, method=method)
+            self.assertTrue(np.all(out.converged))
+            np.testing.assert_allclose(out.V, ref.V, atol=1e-9)
+        with self.assertRaises(ValueError):
+            time_series(self.system, pl=self.pl[:, :2])
+        with self.assertRaises(ValueError):
+            time_series(self.system)
+
+
+if __name__ == '__main__':
+    unittest.main()
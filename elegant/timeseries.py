@@ -0,0 +1,132 @@
+import numpy as np
+
+from .core import BranchFlows
+from .methods import fast_decoupled, gauss_seidel, newton_raphson, warm_start
+
+__all__ = ['time_series', 'ArraySink']
+
+
+class ArraySink(object):
+    """Preallocated arrays receiving the results of a time-series load flow
+
+    Attributes
+    ----------
+    V: array, shape (T, N)
+        Bus voltages in ``buses`` order, zero where not energized
+    S: array, shape (T, N)
+        Complex power injected at each bus
+    S1, S2, Sper: array, shape (T, B)
+        Branch flows and losses, rows following the branch table
+    loading: array, shape (T, B)
+        I/Imax of lines and S/Snom of transformers (%)
+    niter: array, shape (T,)
+        Number of solver iterations of each step
+    converged: array, shape (T,)
+        Whether each step converged
+    reason: array of str, shape (T,)
+        Why the solver of each step stopped, see SolverResult
+    elapsed: array, shape (T,)
+        Solver time of each step (s)
+    """
+    def __init__(self, T, N, B):
+        self.V = np.zeros((T, N), complex)
+        self.S = np.zeros((T, N), complex)
+        self.S1 = np.zeros((T, B), complex)
+        self.S2 = np.zeros((T, B), complex)
+        self.Sper = np.zeros((T, B), complex)
+        self.loading = np.zeros((T, B))
+        self.niter = np.zeros(T, int)
+        self.converged = np.zeros(T, bool)
+        self.reason = np.zeros(T, 'U10')
+        self.elapsed = np.zeros(T)
+
+    def write(self, t, result, V, S, flows):
+        self.V[t] = V
+        self.S[t] = S
+        self.niter[t] = result.niter
+        self.converged[t] = result.converged
+        self.reason[t] = result.reason
+        self.elapsed[t] = result.time
+        if flows is not None:
+            self.S1[t] = flows.S1
+            self.S2[t] = flows.S2
+            self.Sper[t] = flows.Sper
+            self.loading[t] = flows.loading
+
+
+def profile(values, base, T):
+    if values is None:
+        return np.broadcast_to(base, (T, base.size))
+    values = np.asarray(values, float)
+    if values.shape != (T, base.size):
+        raise ValueError("profiles must have shape (T, N) = ({}, {})".format(T, base.size))
+    return values
+
+
+def time_series(system, pl=None, ql=None, pg=None, method='newton', Nmax=100, eps=1e-12,
+                sink=None, flows=True):
+    """Quasi-static load flow over load and generation profiles
+
+    The admittance matrix (and the B' and B'' factorizations of the
+    fast-decoupled methods) is built once and every step is started from
+    the voltages of the previous one. The buses of the system are left
+    untouched.
+
+    Parameters
+    ----------
+    system: PowerSystem object
+    pl, ql, pg: array, shape (T, N), optional
+        Load and generation of each bus (in ``system.buses`` order) at each
+        step, defaulting to the values stored in the buses
+    method: {'newton', 'fdxb', 'fdbx', 'gauss_seidel'}, optional
+        Load flow method
+    Nmax: int, optional
+        Maximum number of iterations per step
+    eps: float, optional
+        Tolerance
+    sink: object, optional
+        Receives ``write(t, result, V, S, flows)`` after each step,
+        defaults to a new ArraySink
+    flows: bool, optional
+        Whether to compute the branch flows of each step
+
+    Returns
+    -------
+    sink: ArraySink or the given sink
+    """
+    T = next((np.shape(x)[0] for x in (pl, ql, pg) if x is not None), None)
+    if T is None:
+        raise ValueError("at least one profile must be given")
+    buses = system.bus_table
+    branches = system.branch_table
+    pl = profile(pl, buses.pl, T)
+    ql = profile(ql, buses.ql, T)
+    pg = profile(pg, buses.pg, T)
+    if sink is None:
+        sink = ArraySink(T, len(buses), len(branches))
+    Y = system.Y
+    if method in ('fdxb', 'fdbx'):
+        Bp, Bpp = system.decoupled_matrices(variant=method[2:].upper())
+        factors = {}
+    elif method not in ('newton', 'gauss_seidel'):
+        raise ValueError("unknown load flow method '{}'".format(method))
+    energized = buses.energized
+    node = buses.index[energized]
+    Vprev = None
+    for t in range(T):
+        V0, S0 = system.flow_inputs(pl=pl[t], ql=ql[t], pg=pg[t])
+        if Vprev is not None:
+            V0 = warm_start(V0, S0, Vprev)
+        if method == 'newton':
+            result = newton_raphson(Y, V0, S0, eps=eps, Nmax=Nmax)
+        elif method == 'gauss_seidel':
+            result = gauss_seidel(Y, V0, S0, eps=eps, Nmax=Nmax)
+        else:
+            result = fast_decoupled(Y, V0, S0, Bp, Bpp, eps=eps, Nmax=Nmax, factors=factors)
+        if result.converged:
+            Vprev = result.V
+        V = np.zeros(len(buses), complex)
+        V[energized] = result.V[node]
+        S = V * np.conjugate(Y.dot(result.V))[np.maximum(buses.index, 0)]
+        sink.write(t, result, V, S, BranchFlows(V, branches) if flows else None)
+    return sink
@@ -14,7 +14,8 @@ with open("README.md", 'r') as f:
 install_requires = [
     "networkx >= 1.1",
     "numpy",
-    "PyQt5"
+    "PyQt5",
+    "scipy"
 ]
 
 extras_require = {